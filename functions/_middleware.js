@@ -1,4 +1,14 @@
-const TRACKED_PATHS = new Set(["/ipo.ics", "/earnings.ics", "/all.ics"]);
+const MANIFEST_PATH = "/manifest.json";
+const MANIFEST_TTL_MS = 60 * 1000;
+
+// Preferred order when the client accepts several precompressed variants.
+const ENCODING_SUFFIXES = [
+  ["br", ".br"],
+  ["zstd", ".zst"],
+  ["gzip", ".gz"],
+];
+
+let manifestCache = { manifest: null, loadedAt: 0 };
 
 async function hashVisitorKey(value) {
   const data = new TextEncoder().encode(value);
@@ -8,12 +18,71 @@ async function hashVisitorKey(value) {
     .join("");
 }
 
+// Per-feed ETags and precompressed variants, written by the build into dist/manifest.json.
+async function loadManifest(context) {
+  const now = Date.now();
+  if (manifestCache.manifest && now - manifestCache.loadedAt < MANIFEST_TTL_MS) {
+    return manifestCache.manifest;
+  }
+  const assets = context.env && context.env.ASSETS;
+  if (!assets || typeof assets.fetch !== "function") {
+    return null;
+  }
+  try {
+    const res = await assets.fetch(new URL(MANIFEST_PATH, context.request.url));
+    if (!res.ok) {
+      return null;
+    }
+    const manifest = await res.json();
+    manifestCache = { manifest, loadedAt: now };
+    return manifest;
+  } catch (err) {
+    console.error("ICS manifest load failed", err);
+    return null;
+  }
+}
+
+function matchesEtag(ifNoneMatch, etag) {
+  if (!ifNoneMatch) {
+    return false;
+  }
+  return ifNoneMatch
+    .split(",")
+    .map((tag) => tag.trim().replace(/^W\//, ""))
+    .some((tag) => tag === "*" || tag === etag);
+}
+
+function acceptedEncodings(header) {
+  const accepted = new Set();
+  for (const part of (header || "").split(",")) {
+    const [name, ...params] = part.trim().toLowerCase().split(";");
+    const q = params.map((p) => p.trim()).find((p) => p.startsWith("q="));
+    if (name && !(q && parseFloat(q.slice(2)) === 0)) {
+      accepted.add(name);
+    }
+  }
+  return accepted;
+}
+
+function pickEncoding(header, available) {
+  const accepted = acceptedEncodings(header);
+  return ENCODING_SUFFIXES.find(
+    ([name]) => available.includes(name) && (accepted.has(name) || accepted.has("*"))
+  );
+}
+
+// Each representation gets its own strong ETag: "<hash>" for identity, "<hash>-gzip" etc.
+function variantEtag(etag, encoding) {
+  return encoding ? `${etag.slice(0, -1)}-${encoding}"` : etag;
+}
+
 export const onRequest = [
   async (context) => {
     const { request, env } = context;
     const url = new URL(request.url);
 
-    if (!TRACKED_PATHS.has(url.pathname)) {
+    // All feeds, including fan-out ones under /symbols, /exchanges and /watchlists
+    if (!url.pathname.endsWith(".ics")) {
       return context.next();
     }
 
@@ -39,6 +108,50 @@ export const onRequest = [
       }
     }
 
-    return context.next();
+    const manifest = await loadManifest(context);
+    const etag = manifest && manifest.etags && manifest.etags[url.pathname];
+    if (!etag) {
+      return context.next();
+    }
+
+    const available = (manifest.encodings && manifest.encodings[url.pathname]) || [];
+    const choice = request.method === "GET" && pickEncoding(request.headers.get("accept-encoding"), available);
+    const encoding = choice ? choice[0] : null;
+    const responseEtag = variantEtag(etag, encoding);
+    const baseHeaders = {
+      ETag: responseEtag,
+      Vary: "Accept-Encoding",
+      "Cache-Control": "public, max-age=0, must-revalidate",
+    };
+
+    if (matchesEtag(request.headers.get("if-none-match"), responseEtag)) {
+      return new Response(null, { status: 304, headers: baseHeaders });
+    }
+
+    if (choice) {
+      const variant = await env.ASSETS.fetch(new URL(url.pathname + choice[1], request.url));
+      if (variant.ok) {
+        // encodeBody: "manual" stops the runtime from compressing the already-compressed body again.
+        return new Response(variant.body, {
+          status: 200,
+          headers: {
+            ...baseHeaders,
+            "Content-Type": "text/calendar; charset=utf-8",
+            "Content-Encoding": encoding,
+          },
+          encodeBody: "manual",
+        });
+      }
+    }
+
+    const response = await context.next();
+    if (response.status !== 200) {
+      return response;
+    }
+    const tagged = new Response(response.body, response);
+    for (const [name, value] of Object.entries(baseHeaders)) {
+      tagged.headers.set(name, value);
+    }
+    return tagged;
   },
 ];
@@ -0,0 +1,150 @@
+from __future__ import annotations
+
+import hashlib
+import json
+import logging
+import re
+import zlib
+from datetime import date
+from pathlib import Path
+from typing import Any, Dict, List, Optional
+
+from .snapshot_store import canonical_json
+from .utils import atomic_write_bytes
+
+INDEX_NAME = "index.json"
+# Delta chains are cut after this many links so a rebuild never decodes more
+# than a handful of objects per shard.
+MAX_DELTA_DEPTH = 8
+_LEGACY_RE = re.compile(r"^\d{4}-\d{2}-\d{2}\.json$")
+
+
+class Archive:
+    """Content-addressed history of one payload kind under ``data/archive/<kind>``.
+
+    Every shard payload (one month or day, as in :class:`SnapshotStore`) is
+    stored once as ``objects/<sha256>.z``, so a shard that did not change
+    between runs costs nothing. A new version of a shard is zlib-compressed
+    with the previous run's version of the same shard as preset dictionary
+    (an LZ77 delta; zlib only looks at the base's last 32 KiB). ``index.json``
+    maps each run date to its shard hashes and each object to its delta base.
+    """
+
+    def __init__(self, directory: Path) -> None:
+        self.directory = Path(directory)
+        self.index: Dict[str, Any] = {"runs": {}, "objects": {}}
+        try:
+            with (self.directory / INDEX_NAME).open("r", encoding="utf-8") as f:
+                index = json.load(f)
+            if isinstance(index, dict) and isinstance(index.get("runs"), dict):
+                self.index = index
+        except (OSError, ValueError):
+            pass
+        self._pending_day: Optional[str] = None
+        self._pending: Dict[str, str] = {}
+        self._previous: Dict[str, str] = {}
+        self._written = 0
+
+    def dates(self) -> List[str]:
+        return sorted(self.index["runs"])
+
+    def _object_path(self, digest: str) -> Path:
+        return self.directory / "objects" / f"{digest}.z"
+
+    def _decode(self, digest: str, memo: Dict[str, bytes]) -> bytes:
+        if digest in memo:
+            return memo[digest]
+        base = self.index["objects"][digest].get("base")
+        blob = self._object_path(digest).read_bytes()
+        if base:
+            d = zlib.decompressobj(zdict=self._decode(base, memo))
+            raw = d.decompress(blob) + d.flush()
+        else:
+            raw = zlib.decompress(blob)
+        memo[digest] = raw
+        return raw
+
+    def rebuild(self, run_date: str) -> Dict[str, Any]:
+        """Reassemble the full snapshot mapping archived for ``run_date``."""
+        memo: Dict[str, bytes] = {}
+        return {
+            key: json.loads(self._decode(digest, memo))
+            for key, digest in sorted(self.index["runs"][run_date].items())
+        }
+
+    def _previous_run(self, run_date: str) -> Optional[Dict[str, str]]:
+        earlier = [d for d in self.index["runs"] if d < run_date]
+        return self.index["runs"][max(earlier)] if earlier else None
+
+    def add(self, run_date: date, key: str, data: bytes) -> None:
+        """Archive one shard's canonical JSON bytes as part of ``run_date``'s run.
+
+        Shards can be added one at a time as they arrive; :meth:`commit`
+        writes the run into the index.
+        """
+        day = run_date.isoformat()
+        if self._pending_day != day:
+            self._pending_day, self._pending, self._written = day, {}, 0
+            self._previous = self._previous_run(day) or {}
+        digest = hashlib.sha256(data).hexdigest()
+        self._pending[key] = digest
+        if digest in self.index["objects"]:
+            return
+        base = self._previous.get(key)
+        if base and self.index["objects"].get(base, {}).get("depth", 0) < MAX_DELTA_DEPTH:
+            c = zlib.compressobj(9, zdict=self._decode(base, {}))
+            blob = c.compress(data) + c.flush()
+            meta = {"base": base, "depth": self.index["objects"][base].get("depth", 0) + 1}
+        else:
+            blob = zlib.compress(data, 9)
+            meta = {"base": None, "depth": 0}
+        atomic_write_bytes(self._object_path(digest), blob)
+        self.index["objects"][digest] = meta
+        self._written += 1
+
+    def commit(self, run_date: date) -> int:
+        """Write the shards added for ``run_date`` to the index; returns the new object count."""
+        day = run_date.isoformat()
+        shards = dict(sorted(self._pending.items())) if self._pending_day == day else {}
+        written = self._written if self._pending_day == day else 0
+        self._pending_day, self._pending, self._written = None, {}, 0
+        self.index["runs"][day] = shards
+        atomic_write_bytes(
+            self.directory / INDEX_NAME,
+            json.dumps(self.index, indent=1, sort_keys=True).encode("utf-8"),
+        )
+        logging.info(
+            "Archived %s/%s: %d shards, %d new objects",
+            self.directory.name, day, len(shards), written,
+        )
+        return written
+
+    def record(self, run_date: date, snapshots: Dict[str, Any]) -> int:
+        """Archive this run's snapshots; returns how many new objects were written."""
+        for key in sorted(snapshots):
+            self.add(run_date, key, canonical_json(snapshots[key]))
+        return self.commit(run_date)
+
+    def import_legacy(self) -> int:
+        """Fold full-copy ``YYYY-MM-DD.json`` files in the archive dir into the index.
+
+        A legacy file is deleted once its run is in the index, so the archive
+        keeps a single copy of every run.
+        """
+        imported = 0
+        for path in sorted(self.directory.glob("*.json")):
+            if not _LEGACY_RE.match(path.name):
+                continue
+            if path.stem not in self.index["runs"]:
+                try:
+                    with path.open("r", encoding="utf-8") as f:
+                        snapshots = json.load(f)
+                except (OSError, ValueError) as exc:
+                    logging.warning("Skipping unreadable archive %s: %s", path, exc)
+                    continue
+                if not isinstance(snapshots, dict):
+                    continue
+                self.record(date.fromisoformat(path.stem), snapshots)
+                imported += 1
+            path.unlink()
+        return imported
@@ -0,0 +1,195 @@
+"""Offline micro-benchmarks over the checked-in snapshots.
+
+Run with ``python -m src.bench``. Fixtures are ``data/ipo.json``,
+``data/earnings.json`` and every run under ``data/archive/<kind>``, scaled
+up synthetically (``--scales 1 10 100``). Results are written as JSON; when a
+baseline file exists, any benchmark whose best time is more than
+``--threshold`` slower than the baseline fails the run (exit status 1).
+"""
+from __future__ import annotations
+
+import argparse
+import json
+import logging
+import platform
+import statistics
+import time
+from pathlib import Path
+from typing import Any, Callable, Dict, List, Optional, Tuple
+
+from .archive import Archive
+from .build_ics import build_calendar, build_combined_calendar, build_earnings_calendar, fold_line, ical_escape
+from .earnings_table import DEFAULT_LARGE_CAP_MIN, EarningsTable, large_cap_positions
+from .transform import (
+    _parse_date_memo,
+    earnings_table_from_json,
+    normalize_earnings_from_json,
+    normalize_from_json,
+    parse_date_safe,
+)
+from .utils import atomic_write_bytes, configure_logging, env_float
+
+ROOT_DIR = Path(__file__).resolve().parent.parent
+DATA_DIR = ROOT_DIR / "data"
+BENCH_DIR = DATA_DIR / "bench"
+DEFAULT_SCALES = (1, 10, 100)
+# Row keys that identify an event; scaled copies get a suffix so UIDs stay distinct.
+_IDENTITY_KEYS = ("symbol", "ticker", "proposedTickerSymbol", "companyName", "companyname", "company", "name")
+_DATE_KEYS = ("expectedPriceDate", "pricedDate", "date", "reportdate", "earningsdate", "asOf")
+
+
+def load_fixtures(kind: str) -> List[Dict[str, Any]]:
+    """Every payload of one kind: the legacy snapshot plus all archived runs."""
+    payloads: List[Dict[str, Any]] = []
+    archive = Archive(DATA_DIR / "archive" / kind)
+    archived = set(archive.dates())
+    # Legacy full copies not yet folded into the archive index; imported ones
+    # are read back from the archive below, so they count once.
+    legacy = [
+        path for path in sorted((DATA_DIR / "archive" / kind).glob("????-??-??.json"))
+        if path.stem not in archived
+    ]
+    for path in [DATA_DIR / f"{kind}.json"] + legacy:
+        try:
+            with path.open("r", encoding="utf-8") as f:
+                snapshot = json.load(f)
+        except (OSError, ValueError):
+            continue
+        if isinstance(snapshot, dict):
+            payloads.extend(p for p in snapshot.values() if isinstance(p, dict))
+    for run_date in sorted(archived):
+        payloads.extend(p for p in archive.rebuild(run_date).values() if isinstance(p, dict))
+    return payloads
+
+
+def scale_payload(payload: Any, factor: int) -> Any:
+    """Copy ``payload`` with every list of row dicts repeated ``factor`` times."""
+    if isinstance(payload, dict):
+        return {k: scale_payload(v, factor) for k, v in payload.items()}
+    if isinstance(payload, list) and payload and all(isinstance(r, dict) for r in payload):
+        rows = [scale_payload(r, factor) for r in payload]
+        out = list(rows)
+        for copy in range(1, factor):
+            for row in rows:
+                clone = dict(row)
+                for key in _IDENTITY_KEYS:
+                    if clone.get(key):
+                        clone[key] = f"{clone[key]}{copy}"
+                out.append(clone)
+        return out
+    return payload
+
+
+def collect_dates(payload: Any, out: List[str]) -> None:
+    if isinstance(payload, dict):
+        for key, value in payload.items():
+            if key in _DATE_KEYS and isinstance(value, str):
+                out.append(value)
+            else:
+                collect_dates(value, out)
+    elif isinstance(payload, list):
+        for value in payload:
+            collect_dates(value, out)
+
+
+def measure(fn: Callable[[], Any], repeat: int, setup: Callable[[], None] = lambda: None) -> Dict[str, float]:
+    """Best and median wall time of ``repeat`` calls, in milliseconds."""
+    times: List[float] = []
+    for _ in range(repeat):
+        setup()
+        start = time.perf_counter()
+        fn()
+        times.append((time.perf_counter() - start) * 1000.0)
+    return {"best_ms": round(min(times), 4), "median_ms": round(statistics.median(times), 4)}
+
+
+def run_benchmarks(scales: List[int], repeat: int) -> Dict[str, Dict[str, Any]]:
+    ipo_fixtures = load_fixtures("ipo")
+    earnings_fixtures = load_fixtures("earnings")
+    results: Dict[str, Dict[str, Any]] = {}
+    for scale in scales:
+        ipo_payloads = [scale_payload(p, scale) for p in ipo_fixtures]
+        earnings_payloads = [scale_payload(p, scale) for p in earnings_fixtures]
+        ipo_items = [i for p in ipo_payloads for i in normalize_from_json(p) if i.expected_date]
+        earnings_items = [e for p in earnings_payloads for e in normalize_earnings_from_json(p) if e.report_date]
+        earnings_table = EarningsTable()
+        for p in earnings_payloads:
+            earnings_table.extend(earnings_table_from_json(p))
+        date_strings: List[str] = []
+        collect_dates(ipo_payloads + earnings_payloads, date_strings)
+        texts = [i.company_name for i in ipo_items] + [e.company_name for e in earnings_items]
+        lines = [f"DESCRIPTION:{ical_escape(t)} – " + "x" * 120 for t in texts]
+        rows = len(ipo_items) + len(earnings_items)
+
+        cases: List[Tuple[str, Callable[[], Any], Callable[[], None]]] = [
+            ("normalize_from_json", lambda: [normalize_from_json(p) for p in ipo_payloads], _parse_date_memo.cache_clear),
+            ("normalize_earnings_from_json",
+             lambda: [normalize_earnings_from_json(p) for p in earnings_payloads], _parse_date_memo.cache_clear),
+            ("parse_date_safe", lambda: [parse_date_safe(s) for s in date_strings], _parse_date_memo.cache_clear),
+            ("large_cap_filter",
+             lambda: large_cap_positions(earnings_table, DEFAULT_LARGE_CAP_MIN, 200), lambda: None),
+            ("ical_escape", lambda: [ical_escape(t) for t in texts], lambda: None),
+            ("fold_line", lambda: [fold_line(line) for line in lines], lambda: None),
+            ("build_calendar", lambda: build_calendar(ipo_items), lambda: None),
+            ("build_earnings_calendar", lambda: build_earnings_calendar(earnings_items), lambda: None),
+            ("build_combined_calendar", lambda: build_combined_calendar(ipo_items, earnings_items), lambda: None),
+        ]
+        for name, fn, setup in cases:
+            key = f"{name}@x{scale}"
+            results[key] = dict(measure(fn, repeat, setup), rows=rows)
+            logging.info("%-40s best %10.2f ms  median %10.2f ms", key, results[key]["best_ms"], results[key]["median_ms"])
+    return results
+
+
+def compare(results: Dict[str, Dict[str, Any]], baseline: Dict[str, Dict[str, Any]], threshold: float) -> List[str]:
+    """Names of benchmarks whose best time exceeds the baseline by more than ``threshold``."""
+    regressions: List[str] = []
+    for key, current in sorted(results.items()):
+        previous = baseline.get(key)
+        if not previous or not previous.get("best_ms"):
+            continue
+        ratio = current["best_ms"] / previous["best_ms"]
+        if ratio > 1.0 + threshold:
+            logging.error("Regression %s: %.2f ms -> %.2f ms (x%.2f)", key, previous["best_ms"], current["best_ms"], ratio)
+            regressions.append(key)
+    return regressions
+
+
+def main(argv: Optional[List[str]] = None) -> int:
+    configure_logging()
+    parser = argparse.ArgumentParser(prog="python -m src.bench", description=__doc__.splitlines()[0])
+    parser.add_argument("--scales", type=int, nargs="+", default=list(DEFAULT_SCALES))
+    parser.add_argument("--repeat", type=int, default=5)
+    parser.add_argument("--output", type=Path, default=BENCH_DIR / "latest.json")
+    parser.add_argument("--baseline", type=Path, default=BENCH_DIR / "baseline.json")
+    parser.add_argument(
+        "--threshold", type=float, default=env_float("FICAL_BENCH_THRESHOLD", 0.25),
+        help="allowed slowdown as a fraction of the baseline (default 0.25)",
+    )
+    parser.add_argument("--save-baseline", action="store_true", help="also write the results as the new baseline")
+    args = parser.parse_args(argv)
+
+    results = run_benchmarks(args.scales, max(args.repeat, 1))
+    report = {"python": platform.python_version(), "machine": platform.machine(), "results": results}
+    encoded = json.dumps(report, indent=1, sort_keys=True).encode("utf-8")
+    atomic_write_bytes(args.output, encoded)
+    if args.save_baseline:
+        atomic_write_bytes(args.baseline, encoded)
+        logging.info("Saved baseline %s", args.baseline)
+        return 0
+    try:
+        with args.baseline.open("r", encoding="utf-8") as f:
+            baseline = json.load(f).get("results", {})
+    except (OSError, ValueError, AttributeError):
+        logging.info("No baseline at %s; results written to %s", args.baseline, args.output)
+        return 0
+    regressions = compare(results, baseline, args.threshold)
+    if regressions:
+        logging.error("%d benchmark(s) regressed beyond %.0f%%", len(regressions), args.threshold * 100)
+        return 1
+    logging.info("No regressions beyond %.0f%% against %s", args.threshold * 100, args.baseline)
+    return 0
+
+
+if __name__ == "__main__":
+    raise SystemExit(main())
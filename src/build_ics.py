@@ -1,9 +1,18 @@
 from __future__ import annotations
 
-from datetime import date, datetime, timedelta
-from typing import Iterable, List
+import hashlib
+import heapq
+import os
+import tempfile
+from datetime import date, datetime, timedelta, timezone
+from itertools import chain
+from pathlib import Path
+from typing import BinaryIO, Iterable, Iterator, List, Mapping, Optional, Tuple, Union
 
-from .utils import IpoItem, EarningsItem, utc_now
+from .event_state import EventState
+from .manifest import file_sha256
+from .render_cache import RenderCache
+from .utils import IpoItem, EarningsItem, format_ymd, utc_now
 
 
 def ical_escape(text: str) -> str:
@@ -27,14 +36,14 @@ def fold_line(line: str, limit: int = 75) -> List[str]:
 
 
 def format_all_day(d: date) -> str:
-    return d.strftime("%Y%m%d")
+    return format_ymd(d)
 
 
 def build_vevent(item: IpoItem, now: datetime, summary_prefix: str = "") -> List[str]:
     if item.expected_date is None:
         return []
     dtstamp = now.strftime("%Y%m%dT%H%M%SZ")
-    dtstart = format_all_day(item.expected_date)
+    dtstart = item.ymd
     dtend = format_all_day(item.expected_date + timedelta(days=1))
 
     description_parts: List[str] = []
@@ -58,6 +67,7 @@ def build_vevent(item: IpoItem, now: datetime, summary_prefix: str = "") -> List
         "BEGIN:VEVENT",
         f"UID:{item.uid()}",
         f"DTSTAMP:{dtstamp}",
+        f"LAST-MODIFIED:{dtstamp}",
         f"DTSTART;VALUE=DATE:{dtstart}",
         f"DTEND;VALUE=DATE:{dtend}",
         f"SUMMARY:{ical_escape(summary_prefix + item.summary())}",
@@ -75,29 +85,6 @@ def build_vevent(item: IpoItem, now: datetime, summary_prefix: str = "") -> List
     return folded
 
 
-def build_calendar(items: Iterable[IpoItem]) -> str:
-    now = utc_now()
-    lines: List[str] = [
-        "BEGIN:VCALENDAR",
-        "PRODID:-//fical//nasdaq-ipo//EN",
-        "VERSION:2.0",
-        "CALSCALE:GREGORIAN",
-        "NAME:Nasdaq IPOs",
-        "X-WR-CALNAME:Nasdaq IPOs",
-        "REFRESH-INTERVAL;VALUE=DURATION:P1D",
-        "X-PUBLISHED-TTL:P1D",
-    ]
-
-    for item in items:
-        event_lines = build_vevent(item, now, summary_prefix="[IPO] ")
-        if event_lines:
-            lines.extend(event_lines)
-
-    lines.append("END:VCALENDAR")
-
-    return "\r\n".join(lines) + "\r\n"
-
-
 def build_earnings_vevent(
     item: EarningsItem,
     now: datetime,
@@ -107,8 +94,8 @@ def build_earnings_vevent(
     if item.report_date is None:
         return []
     dtstamp = now.strftime("%Y%m%dT%H%M%SZ")
-    dtstart = item.report_date.strftime("%Y%m%d")
-    dtend = (item.report_date + timedelta(days=1)).strftime("%Y%m%d")
+    dtstart = item.ymd
+    dtend = format_all_day(item.report_date + timedelta(days=1))
 
     description_parts: List[str] = []
     if item.symbol:
@@ -129,6 +116,7 @@ def build_earnings_vevent(
         "BEGIN:VEVENT",
         f"UID:{uid_value}",
         f"DTSTAMP:{dtstamp}",
+        f"LAST-MODIFIED:{dtstamp}",
         f"DTSTART;VALUE=DATE:{dtstart}",
         f"DTEND;VALUE=DATE:{dtend}",
         f"SUMMARY:{ical_escape(summary_prefix + item.summary())}",
@@ -146,32 +134,74 @@ def build_earnings_vevent(
     return folded
 
 
-def build_earnings_calendar(items: Iterable[EarningsItem]) -> str:
-    now = utc_now()
-    lines: List[str] = [
+CRLF = "\r\n"
+
+_STAMP_EPOCH = datetime(1970, 1, 1, tzinfo=timezone.utc)
+_STAMP_PLACEHOLDER = "19700101T000000Z"
+
+
+def apply_stamp(block: str, stamp: str) -> str:
+    """Swap the placeholder DTSTAMP/LAST-MODIFIED of a cached block for ``stamp``."""
+    return block.replace(
+        "DTSTAMP:" + _STAMP_PLACEHOLDER, "DTSTAMP:" + stamp, 1
+    ).replace(
+        "LAST-MODIFIED:" + _STAMP_PLACEHOLDER, "LAST-MODIFIED:" + stamp, 1
+    )
+
+
+def calendar_header(prodid: str, name: str) -> List[str]:
+    return [
         "BEGIN:VCALENDAR",
-        "PRODID:-//fical//nasdaq-earnings//EN",
+        f"PRODID:-//fical//{prodid}//EN",
         "VERSION:2.0",
         "CALSCALE:GREGORIAN",
-        "NAME:Nasdaq Earnings",
-        "X-WR-CALNAME:Nasdaq Earnings",
+        f"NAME:{name}",
+        f"X-WR-CALNAME:{name}",
         "REFRESH-INTERVAL;VALUE=DURATION:P1D",
         "X-PUBLISHED-TTL:P1D",
     ]
 
+
+IPO_HEADER = calendar_header("nasdaq-ipo", "Nasdaq IPOs")
+EARNINGS_HEADER = calendar_header("nasdaq-earnings", "Nasdaq Earnings")
+COMBINED_HEADER = calendar_header("nasdaq-all", "Nasdaq IPOs & Earnings")
+
+
+def render_event(event_lines: List[str]) -> str:
+    """Join already-folded VEVENT lines into one CRLF-terminated block."""
+    return CRLF.join(event_lines) + CRLF if event_lines else ""
+
+
+def render_calendar(header: List[str], events: Iterable[str]) -> str:
+    return CRLF.join(header) + CRLF + "".join(events) + "END:VCALENDAR" + CRLF
+
+
+def iter_ipo_events(items: Iterable[IpoItem], now: datetime) -> Iterator[str]:
     for item in items:
-        event_lines = build_earnings_vevent(
-            item,
-            now,
-            summary_prefix="[ERN] ",
-            use_bare_uid=True,
+        block = render_event(build_vevent(item, now, summary_prefix="[IPO] "))
+        if block:
+            yield block
+
+
+def iter_earnings_events(
+    items: Iterable[EarningsItem],
+    now: datetime,
+    use_bare_uid: bool = False,
+) -> Iterator[str]:
+    for item in items:
+        block = render_event(
+            build_earnings_vevent(item, now, summary_prefix="[ERN] ", use_bare_uid=use_bare_uid)
         )
-        if event_lines:
-            lines.extend(event_lines)
+        if block:
+            yield block
 
-    lines.append("END:VCALENDAR")
 
-    return "\r\n".join(lines) + "\r\n"
+def build_calendar(items: Iterable[IpoItem]) -> str:
+    return render_calendar(IPO_HEADER, iter_ipo_events(items, utc_now()))
+
+
+def build_earnings_calendar(items: Iterable[EarningsItem]) -> str:
+    return render_calendar(EARNINGS_HEADER, iter_earnings_events(items, utc_now(), use_bare_uid=True))
 
 
 def build_combined_calendar(
@@ -184,27 +214,174 @@ def build_combined_calendar(
     subscribing to the combined feed.
     """
     now = utc_now()
-    lines: List[str] = [
-        "BEGIN:VCALENDAR",
-        "PRODID:-//fical//nasdaq-all//EN",
-        "VERSION:2.0",
-        "CALSCALE:GREGORIAN",
-        "NAME:Nasdaq IPOs & Earnings",
-        "X-WR-CALNAME:Nasdaq IPOs & Earnings",
-        "REFRESH-INTERVAL;VALUE=DURATION:P1D",
-        "X-PUBLISHED-TTL:P1D",
-    ]
+    return render_calendar(
+        COMBINED_HEADER,
+        chain(iter_ipo_events(ipo_items, now), iter_earnings_events(earnings_items, now)),
+    )
 
-    for item in ipo_items:
-        event_lines = build_vevent(item, now, summary_prefix="[IPO] ")
-        if event_lines:
-            lines.extend(event_lines)
 
-    for item in earnings_items:
-        event_lines = build_earnings_vevent(item, now, summary_prefix="[ERN] ")
-        if event_lines:
-            lines.extend(event_lines)
+class FeedWriter:
+    """Stream one VCALENDAR to ``path`` as UTF-8 bytes, one event at a time.
+
+    Output goes to a temp file next to ``path``. Events arrive with
+    placeholder stamps, and the content hash is taken over that stamp-free
+    form, so a run that only moves DTSTAMP hashes the same. On close the temp
+    file replaces ``path`` only when the hash differs from ``previous_hash``
+    or ``path`` is missing; otherwise the existing file is left untouched.
+    ``etag`` is a strong validator over the bytes left at ``path``.
+    """
+
+    def __init__(
+        self,
+        path: Path,
+        header: List[str],
+        stamp: Optional[str] = None,
+        previous_hash: Optional[str] = None,
+    ) -> None:
+        self.path = Path(path)
+        self.events = 0
+        self.changed = False
+        self.sha256 = ""
+        self.etag = ""
+        self._stamp = stamp or utc_now().strftime("%Y%m%dT%H%M%SZ")
+        self._previous_hash = previous_hash
+        self._digest = hashlib.sha256()
+        self._bytes_digest = hashlib.sha256()
+        fd, tmp = tempfile.mkstemp(dir=self.path.parent, prefix=self.path.name, suffix=".tmp")
+        self._tmp = Path(tmp)
+        self._file: BinaryIO = os.fdopen(fd, "wb")
+        self._write(CRLF.join(header) + CRLF)
+
+    def _write(self, text: str, stamp: Optional[str] = None) -> None:
+        self._digest.update(text.encode("utf-8"))
+        data = apply_stamp(text, stamp or self._stamp).encode("utf-8")
+        self._bytes_digest.update(data)
+        self._file.write(data)
+
+    def write_event(self, block: str, stamp: Optional[str] = None) -> None:
+        """Write a placeholder-stamped block, stamped with ``stamp`` or the run time."""
+        self._write(block, stamp)
+        self.events += 1
+
+    def close(self) -> None:
+        if self._file.closed:
+            return
+        self._write("END:VCALENDAR" + CRLF)
+        self._file.close()
+        self.sha256 = self._digest.hexdigest()
+        self.changed = self.sha256 != self._previous_hash or not self.path.exists()
+        if self.changed:
+            # mkstemp creates 0600 files; published feeds must be world-readable.
+            os.chmod(self._tmp, 0o644)
+            os.replace(self._tmp, self.path)
+            self.etag = f'"{self._bytes_digest.hexdigest()}"'
+        else:
+            self._tmp.unlink()
+            self.etag = f'"{file_sha256(self.path)}"'
+
+    def __enter__(self) -> "FeedWriter":
+        return self
+
+    def __exit__(self, exc_type: object, *exc: object) -> None:
+        if exc_type is None:
+            self.close()
+            return
+        self._file.close()
+        self._tmp.unlink(missing_ok=True)
+
+
+def render_combined_block(item: object, cache: Optional[RenderCache] = None) -> str:
+    """Placeholder-stamped block for ``item`` as it appears in the combined feed."""
+    def build() -> str:
+        if isinstance(item, IpoItem):
+            return render_event(build_vevent(item, _STAMP_EPOCH, summary_prefix="[IPO] "))
+        return render_event(build_earnings_vevent(item, _STAMP_EPOCH, summary_prefix="[ERN] "))  # type: ignore[arg-type]
+
+    if isinstance(item, IpoItem):
+        variant, day = "ipo", item.expected_date
+    else:
+        variant, day = "earnings", item.report_date  # type: ignore[attr-defined]
+    if cache is None or day is None:
+        return build()
+    return cache.get_or_render(item, variant, day, build)
+
+
+def with_bare_uid(block: str, item: EarningsItem) -> str:
+    """Turn a combined-feed earnings block into its ``earnings.ics`` form.
+
+    The two differ only in the UID line (the standalone feed uses the bare
+    UID), so the line is swapped instead of rendering the event again.
+    """
+    start = len("BEGIN:VEVENT" + CRLF)
+    end = block.index(CRLF + "DTSTAMP:", start)
+    return block[:start] + CRLF.join(fold_line(f"UID:{item.uid_without_category_prefix()}")) + block[end:]
 
-    lines.append("END:VCALENDAR")
 
-    return "\r\n".join(lines) + "\r\n"
+def render_earnings_block(item: EarningsItem, cache: Optional[RenderCache] = None) -> str:
+    """Placeholder-stamped block for ``item`` as it appears in ``earnings.ics`` (bare UID)."""
+    return with_bare_uid(render_combined_block(item, cache), item)
+
+
+def merged_events(
+    ipo_items: Iterable[IpoItem],
+    earnings_items: Iterable[EarningsItem],
+) -> Iterator[Tuple[date, str, Union[IpoItem, EarningsItem]]]:
+    """Yield ``(day, category, item)`` in combined-feed order.
+
+    Both inputs must already be sorted by date. Undated items are dropped,
+    and on the same day IPOs come before earnings. ``category`` is ``"ipo"``
+    or ``"earnings"``, the key :class:`EventState` stamps are tracked under.
+    """
+    ipo_stream = ((i.expected_date, 0, "ipo", i) for i in ipo_items if i.expected_date)
+    earnings_stream = ((e.report_date, 1, "earnings", e) for e in earnings_items if e.report_date)
+    for day, _, category, item in heapq.merge(ipo_stream, earnings_stream, key=lambda t: (t[0], t[1])):
+        yield day, category, item
+
+
+def write_feeds(
+    ipo_items: Iterable[IpoItem],
+    earnings_items: Iterable[EarningsItem],
+    ipo_path: Path,
+    earnings_path: Path,
+    combined_path: Path,
+    cache: Optional[RenderCache] = None,
+    previous_hashes: Optional[Mapping[str, str]] = None,
+    state: Optional[EventState] = None,
+) -> List[FeedWriter]:
+    """Write the IPO, Earnings and combined feeds in a single pass.
+
+    Both inputs must already be sorted by date. They are merged by date, and
+    each event is rendered once and written to every feed that carries it. An
+    IPO block is byte-identical in ``ipo.ics`` and ``all.ics``. The earnings
+    block for ``earnings.ics`` only has its UID line swapped for the bare UID.
+    With ``cache`` set, unchanged items reuse their previously rendered block.
+    ``previous_hashes`` maps file names to the content hashes of the previous
+    build; a feed whose hash is unchanged is not rewritten. With ``state``
+    set, each event is stamped with its last content change instead of the
+    run time, so unchanged feeds come out byte-identical. Returns the closed
+    writers (ipo, earnings, combined) with event counts, hashes and
+    ``changed`` flags.
+    """
+    run_stamp = utc_now().strftime("%Y%m%dT%H%M%SZ")
+    previous_hashes = previous_hashes or {}
+
+    def writer(path: Path, header: List[str]) -> FeedWriter:
+        return FeedWriter(path, header, run_stamp, previous_hashes.get(Path(path).name))
+
+    def stamp(category: str, item: object) -> Optional[str]:
+        return state.stamp_for(category, item) if state is not None else None
+
+    with writer(ipo_path, IPO_HEADER) as ipo_feed, \
+            writer(earnings_path, EARNINGS_HEADER) as earnings_feed, \
+            writer(combined_path, COMBINED_HEADER) as combined_feed:
+        for _, category, item in merged_events(ipo_items, earnings_items):
+            # Blocks are rendered (and cached) once, with a fixed placeholder
+            # stamp; the writer swaps in the event's stamp on the way out.
+            block = render_combined_block(item, cache)
+            event_stamp = stamp(category, item)
+            if category == "ipo":
+                ipo_feed.write_event(block, event_stamp)
+            else:
+                earnings_feed.write_event(with_bare_uid(block, item), event_stamp)  # type: ignore[arg-type]
+            combined_feed.write_event(block, event_stamp)
+    return [ipo_feed, earnings_feed, combined_feed]
@@ -0,0 +1,129 @@
+from __future__ import annotations
+
+import heapq
+from array import array
+from dataclasses import dataclass, field
+from typing import Dict, Iterable, List, Optional, Sequence
+
+from .utils import EarningsItem
+
+DEFAULT_LARGE_CAP_MIN = 10_000_000_000.0
+NUMERIC_COLUMNS = ("market_cap", "eps", "eps_forecast", "surprise", "estimates")
+MISSING = float("nan")
+# Last characters of anything that can be a number ("N/A" and blanks cannot)
+_NUMERIC_ENDINGS = frozenset("0123456789.%)")
+
+
+def _float(text: str) -> float:
+    try:
+        return float(text)
+    except ValueError:
+        return MISSING
+
+
+def parse_numbers(values: Iterable[Optional[str]]) -> array:
+    """Currency, percent and count strings as a float array; blanks and ``N/A`` become NaN.
+
+    ``"$1,107,697,565,522"``, ``"($0.12)"`` (negative) and ``"12.5%"`` are
+    all accepted. The column is cleaned with plain ``str.replace`` calls and
+    converted with one ``map(float, ...)``; only a column holding some other
+    malformed value falls back to converting value by value.
+    """
+    cleaned = [
+        v.replace(",", "").replace("$", "").replace("%", "").replace("(", "-").replace(")", "")
+        if v and v[-1] in _NUMERIC_ENDINGS else "nan"
+        for v in values
+    ]
+    try:
+        return array("d", map(float, cleaned))
+    except ValueError:
+        return array("d", map(_float, cleaned))
+
+
+@dataclass
+class EarningsTable:
+    """Normalized earnings rows, stored column by column.
+
+    ``items`` are the rows as :class:`EarningsItem` objects (used for
+    rendering). The numeric columns are ``array('d')`` aligned with ``items``,
+    with NaN for missing values: ``market_cap`` in dollars, ``eps`` and
+    ``eps_forecast`` per share, ``surprise`` in percent, and ``estimates``
+    (number of analyst estimates). Filters return row positions so that
+    predicates can be combined before any rows are gathered.
+    """
+
+    items: List[EarningsItem] = field(default_factory=list)
+    fiscal_quarter: List[Optional[str]] = field(default_factory=list)
+    market_cap: array = field(default_factory=lambda: array("d"))
+    eps: array = field(default_factory=lambda: array("d"))
+    eps_forecast: array = field(default_factory=lambda: array("d"))
+    surprise: array = field(default_factory=lambda: array("d"))
+    estimates: array = field(default_factory=lambda: array("d"))
+
+    def __len__(self) -> int:
+        return len(self.items)
+
+    def column(self, name: str) -> array:
+        if name not in NUMERIC_COLUMNS:
+            raise KeyError(f"not a numeric earnings column: {name}")
+        return getattr(self, name)
+
+    def extend(self, other: "EarningsTable") -> None:
+        self.items.extend(other.items)
+        self.fiscal_quarter.extend(other.fiscal_quarter)
+        for name in NUMERIC_COLUMNS:
+            self.column(name).extend(other.column(name))
+
+    def take(self, positions: Sequence[int]) -> "EarningsTable":
+        """A new table with the rows at ``positions``, in that order."""
+        columns: Dict[str, array] = {}
+        for name in NUMERIC_COLUMNS:
+            values = self.column(name)
+            columns[name] = array("d", [values[i] for i in positions])
+        return EarningsTable(
+            items=[self.items[i] for i in positions],
+            fiscal_quarter=[self.fiscal_quarter[i] for i in positions],
+            **columns,
+        )
+
+    def align(self, items: Iterable[EarningsItem]) -> "EarningsTable":
+        """The rows of ``items`` (objects taken from this table), in their order.
+
+        Used after deduplication: the event index keeps some of the ingested
+        item objects, and this gathers their numeric columns to match.
+        """
+        position = {id(item): i for i, item in enumerate(self.items)}
+        return self.take([position[id(item)] for item in items])
+
+    def where(
+        self,
+        name: str,
+        minimum: Optional[float] = None,
+        maximum: Optional[float] = None,
+        among: Optional[Sequence[int]] = None,
+    ) -> List[int]:
+        """Positions whose ``name`` value lies in ``[minimum, maximum]``; NaN never matches."""
+        values = self.column(name)
+        positions = range(len(values)) if among is None else among
+        if minimum is not None and maximum is not None:
+            return [i for i in positions if minimum <= values[i] <= maximum]
+        if minimum is not None:
+            return [i for i in positions if values[i] >= minimum]
+        if maximum is not None:
+            return [i for i in positions if values[i] <= maximum]
+        return [i for i in positions if values[i] == values[i]]
+
+    def top(self, name: str, n: int, among: Optional[Sequence[int]] = None) -> List[int]:
+        """Positions of the ``n`` largest ``name`` values, largest first; NaN rows are skipped."""
+        values = self.column(name)
+        candidates = self.where(name, among=among)
+        return heapq.nlargest(n, candidates, key=values.__getitem__)
+
+
+def large_cap_positions(table: EarningsTable, min_market_cap: float, top_n: int = 0) -> List[int]:
+    """Rows with a market cap of at least ``min_market_cap``, optionally only the
+    ``top_n`` largest of them, in table order."""
+    positions = table.where("market_cap", minimum=min_market_cap)
+    if top_n > 0:
+        positions = sorted(table.top("market_cap", top_n, among=positions))
+    return positions
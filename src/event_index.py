@@ -0,0 +1,158 @@
+from __future__ import annotations
+
+import hashlib
+import json
+import logging
+from dataclasses import dataclass, field, fields
+from datetime import date
+from pathlib import Path
+from typing import Any, Dict, List, Optional, Tuple, Union
+
+from .utils import EarningsItem, IpoItem, atomic_write_bytes, slugify
+
+Item = Union[IpoItem, EarningsItem]
+
+# Two rows for the same company closer than this are one event whose date
+# moved; further apart they are separate events (e.g. consecutive quarters).
+RESCHEDULE_WINDOW_DAYS = 45
+_IPO_STATUS_RANK = {"PRICED": 1}
+_FIELD_NAMES = {cls: tuple(f.name for f in fields(cls) if f.init) for cls in (IpoItem, EarningsItem)}
+
+
+def event_key(item: Item) -> str:
+    return item.symbol or slugify(item.company_name)
+
+
+def event_date(item: Item) -> Optional[date]:
+    return item.expected_date if isinstance(item, IpoItem) else item.report_date
+
+
+def _priority(item: Item) -> Tuple[int, int]:
+    """Higher wins: PRICED over UPCOMING, rows with actual EPS over rows without,
+    then the row with more fields filled in."""
+    if isinstance(item, IpoItem):
+        rank = _IPO_STATUS_RANK.get(item.status, 0)
+    else:
+        rank = 1 if item.eps_actual else 0
+    filled = sum(1 for name in _FIELD_NAMES[type(item)] if getattr(item, name))
+    return rank, filled
+
+
+def _digest(item: Item) -> str:
+    return hashlib.blake2b(repr(item).encode("utf-8"), digest_size=12).hexdigest()
+
+
+@dataclass
+class EventDiff:
+    """Events added, changed (content or date) and removed since the previous run."""
+
+    added: List[Dict[str, Any]] = field(default_factory=list)
+    changed: List[Dict[str, Any]] = field(default_factory=list)
+    removed: List[Dict[str, Any]] = field(default_factory=list)
+
+    def as_dict(self) -> Dict[str, List[Dict[str, Any]]]:
+        return {"added": self.added, "changed": self.changed, "removed": self.removed}
+
+
+class EventIndex:
+    """Canonical IPO and earnings events keyed by ``(category, symbol-or-slug)``.
+
+    :meth:`upsert` is O(1): a row joins the event of the same company within
+    ``RESCHEDULE_WINDOW_DAYS`` of its date, replacing it only when it has a
+    higher priority (see :func:`_priority`), so a moved date or a duplicate
+    UPCOMING/PRICED listing yields one event instead of two. ``path`` persists
+    ``key -> [date, content hash, uid]`` between runs for :meth:`diff`.
+    """
+
+    def __init__(self, path: Optional[Path] = None) -> None:
+        self.path = Path(path) if path else None
+        self._events: Dict[Tuple[str, str], List[Item]] = {}
+        self._previous: Dict[str, List[List[str]]] = {}
+        self.merged = 0
+
+    def load(self) -> "EventIndex":
+        if self.path is None:
+            return self
+        try:
+            with self.path.open("r", encoding="utf-8") as f:
+                previous = json.load(f)
+        except (OSError, ValueError):
+            return self
+        if isinstance(previous, dict):
+            self._previous = {k: v for k, v in previous.items() if isinstance(v, list)}
+        return self
+
+    def upsert(self, category: str, item: Item) -> None:
+        day = event_date(item)
+        if day is None:
+            return
+        slot = self._events.setdefault((category, event_key(item)), [])
+        for position, existing in enumerate(slot):
+            if abs((event_date(existing) - day).days) <= RESCHEDULE_WINDOW_DAYS:  # type: ignore[operator]
+                self.merged += 1
+                if _priority(item) > _priority(existing):
+                    slot[position] = item
+                return
+        slot.append(item)
+
+    def items(self, category: str) -> List[Item]:
+        """The category's events sorted by date, then company name.
+
+        Rows arrive month by month and day by day, so the input is nearly
+        sorted already and Timsort finishes in close to linear time.
+        """
+        out = [item for (cat, _), slot in self._events.items() if cat == category for item in slot]
+        out.sort(key=lambda i: (event_date(i), i.company_name))
+        return out
+
+    def _current(self) -> Dict[str, List[List[str]]]:
+        current: Dict[str, List[List[str]]] = {}
+        for (category, key), slot in self._events.items():
+            current[f"{category}|{key}"] = [
+                [event_date(item).isoformat(), _digest(item), item.uid()]  # type: ignore[union-attr]
+                for item in slot
+            ]
+        return current
+
+    def diff(self, horizon_start: Optional[date] = None) -> EventDiff:
+        """Compare with the previous run's index.
+
+        A previous event is matched to the current event of the same key
+        nearest in date within the reschedule window; a different date or
+        content hash makes it ``changed``. Unmatched previous events dated
+        before ``horizon_start`` have simply expired and are not reported.
+        """
+        cutoff = horizon_start.isoformat() if horizon_start else ""
+        current = self._current()
+        result = EventDiff()
+        for name in sorted(current.keys() | self._previous.keys()):
+            category, key = name.split("|", 1)
+            unmatched = [entry for entry in self._previous.get(name, []) if len(entry) == 3]
+            for day, digest, uid in current.get(name, []):
+                when = date.fromisoformat(day)
+                candidates = [
+                    (abs((date.fromisoformat(p[0]) - when).days), i) for i, p in enumerate(unmatched)
+                ]
+                candidates = [c for c in candidates if c[0] <= RESCHEDULE_WINDOW_DAYS]
+                entry = {"category": category, "key": key, "uid": uid, "date": day}
+                if not candidates:
+                    result.added.append(entry)
+                    continue
+                prev_day, prev_digest, _ = unmatched.pop(min(candidates)[1])
+                if prev_day != day:
+                    result.changed.append(dict(entry, previous_date=prev_day))
+                elif prev_digest != digest:
+                    result.changed.append(entry)
+            for prev_day, _, uid in unmatched:
+                if prev_day >= cutoff:
+                    result.removed.append({"category": category, "key": key, "uid": uid, "date": prev_day})
+        return result
+
+    def save(self) -> None:
+        if self.path is None:
+            return
+        atomic_write_bytes(self.path, json.dumps(self._current(), sort_keys=True, separators=(",", ":")).encode("utf-8"))
+        logging.info(
+            "Event index: %d events, %d duplicate or rescheduled rows merged",
+            sum(len(slot) for slot in self._events.values()), self.merged,
+        )
@@ -0,0 +1,62 @@
+from __future__ import annotations
+
+import hashlib
+import json
+import logging
+from datetime import datetime
+from pathlib import Path
+from typing import Dict, List, Optional
+
+from .utils import atomic_write_bytes, utc_now
+
+
+class EventState:
+    """When each event's content last changed, persisted between runs.
+
+    Keys are ``<category>|<uid>``. Each value holds a hash of the item's fields
+    and the UTC timestamp of the run that first saw that hash. That timestamp
+    becomes the event's DTSTAMP/LAST-MODIFIED, so unchanged events render
+    byte-identically from run to run. Events not seen in a run are dropped on
+    :meth:`save`.
+    """
+
+    def __init__(self, path: Path, now: Optional[datetime] = None) -> None:
+        self.path = Path(path)
+        self.now = (now or utc_now()).strftime("%Y%m%dT%H%M%SZ")
+        self._entries: Dict[str, List[str]] = {}
+        self._seen: Dict[str, List[str]] = {}
+        self.changed = 0
+
+    def load(self) -> "EventState":
+        try:
+            with self.path.open("r", encoding="utf-8") as f:
+                entries = json.load(f)
+        except (OSError, ValueError):
+            return self
+        if isinstance(entries, dict):
+            self._entries = {k: v for k, v in entries.items() if isinstance(v, list) and len(v) == 2}
+        return self
+
+    def stamp_for(self, category: str, item: object) -> str:
+        """Return the ``YYYYMMDDTHHMMSSZ`` stamp of the item's last content change."""
+        key = f"{category}|{item.uid()}"  # type: ignore[attr-defined]
+        seen = self._seen.get(key)
+        if seen is not None:
+            return seen[1]
+        digest = hashlib.blake2b(repr(item).encode("utf-8"), digest_size=12).hexdigest()
+        entry = self._entries.get(key)
+        if entry is None or entry[0] != digest:
+            entry = [digest, self.now]
+            self.changed += 1
+        self._seen[key] = entry
+        return entry[1]
+
+    def save(self) -> None:
+        atomic_write_bytes(
+            self.path,
+            json.dumps(self._seen, sort_keys=True, separators=(",", ":")).encode("utf-8"),
+        )
+        logging.info(
+            "Event state: %d events, %d new or changed, %d dropped",
+            len(self._seen), self.changed, len(set(self._entries) - set(self._seen)),
+        )
@@ -0,0 +1,180 @@
+from __future__ import annotations
+
+import json
+import logging
+import re
+import shutil
+from collections import defaultdict
+from dataclasses import dataclass, field
+from pathlib import Path
+from typing import Any, Dict, Iterable, List, Mapping, Optional, Union
+
+from .build_ics import FeedWriter, calendar_header, ical_escape, merged_events, render_combined_block
+from .event_state import EventState
+from .render_cache import RenderCache
+from .utils import EarningsItem, IpoItem, slugify
+
+_SAFE_NAME = re.compile(r"^[A-Za-z0-9][A-Za-z0-9.\-]*$")
+FANOUT_DIRS = ("symbols", "exchanges", "watchlists")
+
+
+@dataclass
+class FanoutConfig:
+    """Which extra feeds to build.
+
+    ``symbols`` is ``"all"`` (one feed per ticker with events), a list of
+    tickers, or empty. ``exchanges`` adds one IPO feed per listing exchange.
+    ``watchlists`` maps a list name to its tickers.
+    """
+
+    symbols: Union[str, List[str]] = field(default_factory=list)
+    exchanges: bool = False
+    watchlists: Dict[str, List[str]] = field(default_factory=dict)
+
+
+def _tickers(value: Any, what: str) -> List[str]:
+    """A ticker or list of tickers from the config, upper-cased; a single string is one ticker."""
+    if value is None:
+        return []
+    if isinstance(value, (str, int)):
+        value = [value]
+    if not isinstance(value, list) or not all(isinstance(v, (str, int)) for v in value):
+        raise ValueError(f"{what} must be a ticker or a list of tickers")
+    return [str(v).strip().upper() for v in value if str(v).strip()]
+
+
+def load_fanout_config(path: Path) -> Optional[FanoutConfig]:
+    """Read a JSON or YAML fan-out config; YAML needs PyYAML installed.
+
+    The file is edited by hand, so a config that cannot be parsed or has the
+    wrong shape is ignored with a warning (returning None) instead of failing
+    the build; the main feeds still ship.
+    """
+    path = Path(path)
+    if not path.exists():
+        return None
+    try:
+        text = path.read_text(encoding="utf-8")
+        if path.suffix in {".yaml", ".yml"}:
+            try:
+                import yaml
+            except ImportError:
+                logging.warning("PyYAML not installed; ignoring %s", path)
+                return None
+            try:
+                raw = yaml.safe_load(text)
+            except yaml.YAMLError as exc:
+                raise ValueError(f"invalid YAML: {exc}") from None
+        else:
+            raw = json.loads(text)
+        if not isinstance(raw, dict):
+            raise ValueError("expected a mapping")
+        symbols: Union[str, List[str]]
+        if isinstance(raw.get("symbols"), str) and raw["symbols"].strip().lower() == "all":
+            symbols = "all"
+        else:
+            symbols = _tickers(raw.get("symbols"), "symbols")
+        exchanges = raw.get("exchanges", False)
+        if not isinstance(exchanges, bool):
+            raise ValueError("exchanges must be true or false")
+        raw_watchlists = raw.get("watchlists") or {}
+        if not isinstance(raw_watchlists, dict):
+            raise ValueError("watchlists must map list names to tickers")
+        watchlists: Dict[str, List[str]] = {}
+        files: Dict[str, str] = {}
+        for name, tickers in raw_watchlists.items():
+            name = str(name)
+            # Names that map to the same file (also on case-insensitive file systems) would be merged
+            file_name = _file_name(name).lower()
+            if file_name in files:
+                logging.warning(
+                    "Ignoring watchlist %r in %s: it maps to the same feed file as %r",
+                    name, path, files[file_name],
+                )
+                continue
+            files[file_name] = name
+            watchlists[name] = _tickers(tickers, f"watchlist {name!r}")
+    except (OSError, ValueError) as exc:
+        logging.warning("Ignoring fan-out config %s: %s", path, exc)
+        return None
+    return FanoutConfig(symbols=symbols, exchanges=exchanges, watchlists=watchlists)
+
+
+def remove_fanout(dist_dir: Path) -> None:
+    """Delete fan-out feeds left over from a build that had them enabled."""
+    for name in FANOUT_DIRS:
+        shutil.rmtree(Path(dist_dir) / name, ignore_errors=True)
+
+
+def _file_name(value: str) -> str:
+    return value if _SAFE_NAME.match(value) else slugify(value) or "unknown"
+
+
+def write_fanout(
+    dist_dir: Path,
+    ipo_items: Iterable[IpoItem],
+    earnings_items: Iterable[EarningsItem],
+    config: FanoutConfig,
+    cache: Optional[RenderCache] = None,
+    state: Optional[EventState] = None,
+    previous_hashes: Optional[Mapping[str, str]] = None,
+) -> List[FeedWriter]:
+    """Write every per-symbol, per-exchange and watchlist feed.
+
+    One merged pass over the (date-sorted) items builds an index from feed path to
+    event positions and renders each event at most once, in its combined-feed
+    form. Each feed is then a sequential write of shared blocks, so adding
+    feeds costs I/O, not rendering. Feeds from a previous build that are no
+    longer produced are deleted. Returns the closed writers.
+    """
+    dist_dir = Path(dist_dir)
+    previous_hashes = previous_hashes or {}
+    watch_index: Dict[str, List[str]] = defaultdict(list)
+    for name, tickers in config.watchlists.items():
+        for ticker in tickers:
+            watch_index[ticker].append(f"watchlists/{_file_name(name)}.ics")
+    wanted_symbols = None if config.symbols == "all" else set(config.symbols)
+
+    blocks: List[str] = []
+    stamps: List[Optional[str]] = []
+    feeds: Dict[str, List[int]] = {f"watchlists/{_file_name(n)}.ics": [] for n in config.watchlists}
+    titles: Dict[str, str] = {f"watchlists/{_file_name(n)}.ics": f"Nasdaq watchlist: {n}" for n in config.watchlists}
+
+    for _, category, item in merged_events(ipo_items, earnings_items):
+        targets: List[str] = []
+        symbol = (item.symbol or "").upper()
+        if symbol:
+            if wanted_symbols is None or symbol in wanted_symbols:
+                path = f"symbols/{_file_name(symbol)}.ics"
+                targets.append(path)
+                titles.setdefault(path, f"Nasdaq: {symbol}")
+            targets.extend(watch_index.get(symbol, ()))
+        if category == "ipo" and config.exchanges and item.exchange:  # type: ignore[union-attr]
+            path = f"exchanges/{_file_name(item.exchange.lower())}.ics"
+            targets.append(path)
+            titles.setdefault(path, f"Nasdaq IPOs: {item.exchange}")
+        if not targets:
+            continue
+        position = len(blocks)
+        blocks.append(render_combined_block(item, cache))
+        stamps.append(state.stamp_for(category, item) if state else None)
+        for path in dict.fromkeys(targets):
+            feeds.setdefault(path, []).append(position)
+
+    writers: List[FeedWriter] = []
+    for path, positions in sorted(feeds.items()):
+        target = dist_dir / path
+        target.parent.mkdir(parents=True, exist_ok=True)
+        prodid = "nasdaq-" + slugify(path.rsplit(".", 1)[0])
+        header = calendar_header(prodid, ical_escape(titles[path]))
+        with FeedWriter(target, header, previous_hash=previous_hashes.get(path)) as feed:
+            for position in positions:
+                feed.write_event(blocks[position], stamps[position])
+        writers.append(feed)
+
+    produced = set(feeds)
+    for name in previous_hashes:
+        if name.split("/", 1)[0] in FANOUT_DIRS and name not in produced:
+            (dist_dir / name).unlink(missing_ok=True)
+    logging.info("Fan-out: %d feeds from %d rendered events", len(writers), len(blocks))
+    return writers
@@ -1,11 +1,18 @@
 from __future__ import annotations
 
 import logging
+import os
+from collections import deque
+from concurrent.futures import Future, ThreadPoolExecutor
 from datetime import date
-from typing import Any, Dict, List, Optional
+from itertools import islice
+from pathlib import Path
+from typing import Any, Callable, Deque, Dict, Iterable, Iterator, List, Optional, Tuple, TypeVar
 
 import requests
-from bs4 import BeautifulSoup
+
+from .http_cache import CachingSession, ResponseCache
+from .resilience import ResilientAdapter, SessionPolicy
 
 DEFAULT_HEADERS = {
     "User-Agent": (
@@ -18,19 +25,61 @@ DEFAULT_HEADERS = {
     "Referer": "https://www.nasdaq.com/market-activity/ipos",
 }
 
+# Overridable so the pipeline can run against a local stand-in (see src/replay_server.py).
+DEFAULT_API_BASE = "https://api.nasdaq.com"
+DEFAULT_WEB_BASE = "https://www.nasdaq.com"
+
+# Upper bound on simultaneous requests against Nasdaq when fanning out.
+DEFAULT_MAX_IN_FLIGHT = 8
+
+K = TypeVar("K")
+
+
+def api_base() -> str:
+    """Base URL of the JSON API; ``FICAL_NASDAQ_API_BASE`` overrides it."""
+    return (os.environ.get("FICAL_NASDAQ_API_BASE") or DEFAULT_API_BASE).rstrip("/")
+
+
+def web_base() -> str:
+    """Base URL of the HTML site; ``FICAL_NASDAQ_WEB_BASE`` overrides it."""
+    return (os.environ.get("FICAL_NASDAQ_WEB_BASE") or DEFAULT_WEB_BASE).rstrip("/")
+
 
-def get_http_session() -> requests.Session:
-    session = requests.Session()
+def get_http_session(
+    policy: Optional[SessionPolicy] = None,
+    cache_dir: Optional[Path] = None,
+) -> requests.Session:
+    """Build the shared Nasdaq session.
+
+    Requests go through a :class:`ResilientAdapter` (pooled connections,
+    jittered retries on 429/5xx, shared rate limit, circuit breaker and run
+    deadline). With ``cache_dir`` set, GET responses are kept on disk and
+    revalidated with ETag/Last-Modified once their per-endpoint TTL expires.
+    """
+    policy = policy or SessionPolicy(pool_size=DEFAULT_MAX_IN_FLIGHT)
+    session = CachingSession(ResponseCache(cache_dir)) if cache_dir is not None else requests.Session()
     session.headers.update(DEFAULT_HEADERS)
+    adapter = ResilientAdapter(policy)
+    session.mount("https://", adapter)
+    session.mount("http://", adapter)
     return session
 
 
+def session_breaker_open(session: requests.Session) -> bool:
+    """True once the breaker has opened or the run deadline has passed."""
+    adapter = session.get_adapter("https://")
+    if not isinstance(adapter, ResilientAdapter):
+        return False
+    remaining = adapter.remaining()
+    return adapter.breaker.is_open or (remaining is not None and remaining <= 0)
+
+
 def fetch_nasdaq_json_for_month(session: requests.Session, month_start: date) -> Optional[Dict[str, Any]]:
     # Nasdaq often requires a v13 JSON endpoint; keep this flexible.
     # Example historical endpoint (may change):
     # https://api.nasdaq.com/api/ipo/calendar?date=2025-09
     ym = f"{month_start.year:04d}-{month_start.month:02d}"
-    url = f"https://api.nasdaq.com/api/ipo/calendar?date={ym}"
+    url = f"{api_base()}/api/ipo/calendar?date={ym}"
     try:
         r = session.get(url, timeout=20)
         if r.status_code != 200:
@@ -54,7 +103,7 @@ def fetch_nasdaq_earnings_json_for_month(session: requests.Session, month_start:
       https://api.nasdaq.com/api/calendar/earnings?date=2025-09
     """
     ym = f"{month_start.year:04d}-{month_start.month:02d}"
-    url = f"https://api.nasdaq.com/api/calendar/earnings?date={ym}"
+    url = f"{api_base()}/api/calendar/earnings?date={ym}"
     try:
         r = session.get(url, timeout=20)
         if r.status_code != 200:
@@ -76,7 +125,7 @@ def fetch_nasdaq_earnings_json_for_day(session: requests.Session, day: date) ->
     Example: https://api.nasdaq.com/api/calendar/earnings?date=2025-09-28
     """
     ymd = f"{day.year:04d}-{day.month:02d}-{day.day:02d}"
-    url = f"https://api.nasdaq.com/api/calendar/earnings?date={ymd}"
+    url = f"{api_base()}/api/calendar/earnings?date={ymd}"
     try:
         r = session.get(
             url,
@@ -97,7 +146,7 @@ def fetch_nasdaq_earnings_json_for_day(session: requests.Session, day: date) ->
 
 def fetch_nasdaq_html_calendar(session: requests.Session) -> Optional[str]:
     try:
-        url = "https://www.nasdaq.com/market-activity/ipos"
+        url = f"{web_base()}/market-activity/ipos"
         r = session.get(
             url,
             headers={"Accept": "text/html,application/xhtml+xml"},
@@ -112,16 +161,52 @@ def fetch_nasdaq_html_calendar(session: requests.Session) -> Optional[str]:
         return None
 
 
+def fetch_stream(
+    fetch_fn: Callable[[requests.Session, K], Optional[Dict[str, Any]]],
+    session: requests.Session,
+    keys: Iterable[K],
+    max_in_flight: int = DEFAULT_MAX_IN_FLIGHT,
+) -> Iterator[Tuple[K, Optional[Dict[str, Any]]]]:
+    """Yield ``(key, fetch_fn(session, key))`` for every key, in key order.
+
+    Results come back in the order of ``keys`` regardless of completion
+    order, so callers stay deterministic, and are yielded as they arrive.
+    At most ``max_in_flight`` requests run at once, and later keys keep
+    downloading while the caller processes earlier ones. Only a window of
+    ``2 * max_in_flight`` keys is submitted at a time, so one slow response
+    does not stall the pool but finished payloads cannot pile up either;
+    memory stays bounded however many keys there are. ``max_in_flight <= 1``
+    runs serially.
+    """
+    keys = list(keys)
+    if max_in_flight <= 1 or len(keys) <= 1:
+        for k in keys:
+            yield k, fetch_fn(session, k)
+        return
+    workers = min(max_in_flight, len(keys))
+    with ThreadPoolExecutor(max_workers=workers) as pool:
+        pending: Deque[Tuple[K, Future]] = deque()
+        remaining = iter(keys)
+        for k in islice(remaining, 2 * workers):
+            pending.append((k, pool.submit(fetch_fn, session, k)))
+        while pending:
+            k, future = pending.popleft()
+            result = future.result()
+            for nxt in islice(remaining, 1):
+                pending.append((nxt, pool.submit(fetch_fn, session, nxt)))
+            yield k, result
+
+
 def parse_html_fallback(html: str) -> List[Dict[str, Any]]:
     # Minimal best-effort parser; selectors may need updates over time.
-    soup = BeautifulSoup(html, "html.parser")
+    # Only the first <table> is read, streamed, so the rest of the page is never parsed.
+    # Imported here: the HTML parser (lxml when installed) is only needed on this fallback.
+    from .html_table import extract_first_table
+
+    header_cells, table_rows = extract_first_table(html)
+    headers = [h.lower() for h in header_cells]
     rows = []
-    table = soup.find("table")
-    if not table:
-        return rows
-    headers = [th.get_text(strip=True).lower() for th in table.find_all("th")]
-    for tr in table.find_all("tr"):
-        cells = [td.get_text(strip=True) for td in tr.find_all("td")]
+    for cells in table_rows:
         if len(cells) != len(headers):
             continue
         row = {headers[i]: cells[i] for i in range(len(headers))}
@@ -0,0 +1,167 @@
+from __future__ import annotations
+
+from html.parser import HTMLParser
+from typing import Iterator, List, Optional, Tuple
+
+try:  # optional: pip install lxml
+    from lxml import etree
+except ImportError:  # pragma: no cover - depends on environment
+    etree = None
+
+# Input is fed in slices so parsing stops soon after the table closes.
+CHUNK_SIZE = 64 * 1024
+_CELL_TAGS = ("td", "th")
+
+Table = Tuple[List[str], List[List[str]]]
+
+
+def _chunks(html: str) -> Iterator[str]:
+    for start in range(0, len(html), CHUNK_SIZE):
+        yield html[start:start + CHUNK_SIZE]
+
+
+class _TableParser(HTMLParser):
+    """Collects the header and data cells of the first ``<table>`` in a page.
+
+    Only text inside that table is buffered; everything before it is skipped
+    as it streams past and ``done`` is set once the table closes. Cell text is
+    the stripped text nodes joined without a separator, like bs4's
+    ``get_text(strip=True)``. A table nested inside a cell only contributes text.
+    """
+
+    def __init__(self) -> None:
+        super().__init__(convert_charrefs=True)
+        self.headers: List[str] = []
+        self.rows: List[List[str]] = []
+        self.done = False
+        self._depth = 0
+        self._row: Optional[List[str]] = None
+        self._cell: Optional[List[str]] = None
+        self._cell_is_header = False
+        self._text: List[str] = []
+
+    def _flush_text(self) -> None:
+        if self._text:
+            text = "".join(self._text).strip()
+            self._text = []
+            if text and self._cell is not None:
+                self._cell.append(text)
+
+    def _close_cell(self) -> None:
+        self._flush_text()
+        if self._cell is None:
+            return
+        text = "".join(self._cell)
+        if self._cell_is_header:
+            self.headers.append(text)
+        elif self._row is not None:
+            self._row.append(text)
+        self._cell = None
+
+    def _close_row(self) -> None:
+        self._close_cell()
+        if self._row is not None:
+            self.rows.append(self._row)
+            self._row = None
+
+    def handle_starttag(self, tag: str, attrs: list) -> None:
+        if self.done:
+            return
+        if tag == "table":
+            self._depth += 1
+            if self._depth == 1:
+                return
+        if self._depth == 0:
+            return
+        self._flush_text()
+        if self._depth > 1:
+            return
+        if tag == "tr":
+            self._close_row()
+            self._row = []
+        elif tag in _CELL_TAGS:
+            self._close_cell()
+            self._cell = []
+            self._cell_is_header = tag == "th"
+
+    def handle_endtag(self, tag: str) -> None:
+        if self.done or self._depth == 0:
+            return
+        self._flush_text()
+        if tag == "table":
+            self._depth -= 1
+            if self._depth == 0:
+                self._close_row()
+                self.done = True
+        elif self._depth > 1:
+            return
+        elif tag in _CELL_TAGS:
+            self._close_cell()
+        elif tag == "tr":
+            self._close_row()
+
+    def handle_data(self, data: str) -> None:
+        if self._depth and self._cell is not None and not self.done:
+            self._text.append(data)
+
+
+def _extract_stdlib(html: str) -> Table:
+    parser = _TableParser()
+    for chunk in _chunks(html):
+        parser.feed(chunk)
+        if parser.done:
+            break
+    else:
+        parser.close()
+        parser._close_row()
+    return parser.headers, parser.rows
+
+
+def _cell_text(element: "etree._Element") -> str:
+    return "".join(s.strip() for s in element.itertext())
+
+
+def _extract_lxml(html: str) -> Table:
+    parser = etree.HTMLPullParser(events=("start", "end"))
+    headers: List[str] = []
+    rows: List[List[str]] = []
+    depth = 0
+    row: Optional[List[str]] = None
+    for chunk in _chunks(html):
+        parser.feed(chunk)
+        for event, element in parser.read_events():
+            tag = element.tag
+            if tag == "table":
+                depth += 1 if event == "start" else -1
+                if depth == 0 and event == "end":
+                    return headers, rows
+                continue
+            if depth == 0:
+                # Drop page content ahead of the table as it streams past.
+                if event == "end":
+                    element.clear()
+                continue
+            if depth > 1 or event != "end":
+                if event == "start" and depth == 1 and tag == "tr":
+                    row = []
+                continue
+            if tag == "th":
+                headers.append(_cell_text(element))
+            elif tag == "td" and row is not None:
+                row.append(_cell_text(element))
+            elif tag == "tr" and row is not None:
+                rows.append(row)
+                row = None
+    parser.close()
+    return headers, rows
+
+
+def extract_first_table(html: str) -> Table:
+    """Header texts and per-row data cells of the first ``<table>`` in ``html``.
+
+    Uses lxml's pull parser when installed and the stdlib ``HTMLParser``
+    otherwise; both stop reading at the end of the table.
+    """
+    if etree is not None:
+        return _extract_lxml(html)
+    return _extract_stdlib(html)
@@ -0,0 +1,170 @@
+from __future__ import annotations
+
+import hashlib
+import json
+import logging
+import re
+import threading
+import time
+from datetime import date, timedelta
+from pathlib import Path
+from typing import Any, Dict, Optional
+from urllib.parse import parse_qs, urlsplit
+
+import requests
+from requests.structures import CaseInsensitiveDict
+
+from .utils import atomic_write_bytes, today_utc
+
+# Freshness windows (seconds). Days close to "today" change the most: actual EPS
+# lands shortly after the report and schedules firm up the week before.
+TTL_TODAY = 10 * 60
+TTL_RECENT = 30 * 60
+TTL_NEAR = 60 * 60
+TTL_FAR = 6 * 60 * 60
+TTL_SETTLED = 24 * 60 * 60
+TTL_CURRENT_MONTH = 30 * 60
+TTL_DEFAULT = 60 * 60
+
+_DAY_RE = re.compile(r"^\d{4}-\d{2}-\d{2}$")
+_MONTH_RE = re.compile(r"^\d{4}-\d{2}$")
+
+
+def ttl_for_url(url: str, today: Optional[date] = None) -> int:
+    """Return how long a cached response for ``url`` stays fresh, in seconds."""
+    today = today or today_utc()
+    values = parse_qs(urlsplit(url).query).get("date")
+    value = values[0] if values else ""
+    if _DAY_RE.match(value):
+        delta = (date.fromisoformat(value) - today).days
+        if delta == 0:
+            return TTL_TODAY
+        if -7 <= delta < 0:
+            return TTL_RECENT
+        if delta < -7:
+            return TTL_SETTLED
+        if delta <= 7:
+            return TTL_NEAR
+        return TTL_FAR
+    if _MONTH_RE.match(value):
+        month = date(int(value[:4]), int(value[5:7]), 1)
+        current = today.replace(day=1)
+        if month == current:
+            return TTL_CURRENT_MONTH
+        if month < current:
+            return TTL_SETTLED
+        # Next month is still moving; later months rarely do.
+        return TTL_NEAR if month <= (current + timedelta(days=31)).replace(day=1) else TTL_FAR
+    return TTL_DEFAULT
+
+
+class ResponseCache:
+    """Persistent GET response store keyed by URL.
+
+    Each entry is a ``<key>.json`` metadata file (validators, headers, fetch
+    time) next to a ``<key>.body`` file holding the raw payload bytes.
+    """
+
+    def __init__(self, directory: Path) -> None:
+        self.directory = Path(directory)
+        self.directory.mkdir(parents=True, exist_ok=True)
+
+    @staticmethod
+    def key_for(url: str) -> str:
+        return hashlib.sha256(url.encode("utf-8")).hexdigest()
+
+    def load(self, url: str) -> Optional[Dict[str, Any]]:
+        key = self.key_for(url)
+        meta_path = self.directory / f"{key}.json"
+        body_path = self.directory / f"{key}.body"
+        try:
+            meta = json.loads(meta_path.read_text(encoding="utf-8"))
+            meta["body"] = body_path.read_bytes()
+        except (OSError, ValueError):
+            return None
+        if meta.get("url") != url:
+            return None
+        return meta
+
+    def store(self, url: str, response: requests.Response, fetched_at: float) -> None:
+        key = self.key_for(url)
+        meta = {
+            "url": url,
+            "fetched_at": fetched_at,
+            "etag": response.headers.get("ETag"),
+            "last_modified": response.headers.get("Last-Modified"),
+            "encoding": response.encoding,
+            "headers": {"Content-Type": response.headers.get("Content-Type", "")},
+        }
+        atomic_write_bytes(self.directory / f"{key}.body", response.content)
+        atomic_write_bytes(self.directory / f"{key}.json", json.dumps(meta, sort_keys=True).encode("utf-8"))
+
+    def touch(self, url: str, meta: Dict[str, Any], fetched_at: float) -> None:
+        """Mark an entry revalidated (HTTP 304) without rewriting its body."""
+        key = self.key_for(url)
+        updated = {k: v for k, v in meta.items() if k != "body"}
+        updated["fetched_at"] = fetched_at
+        atomic_write_bytes(self.directory / f"{key}.json", json.dumps(updated, sort_keys=True).encode("utf-8"))
+
+
+class CachingSession(requests.Session):
+    """``requests.Session`` that answers GETs from a :class:`ResponseCache`.
+
+    Fresh entries are served without touching the network. Stale entries are
+    revalidated with ``If-None-Match``/``If-Modified-Since``; a 304 refreshes
+    the entry and the cached body is returned as a regular 200 response.
+    Only 200 responses are stored.
+    """
+
+    def __init__(self, cache: ResponseCache) -> None:
+        super().__init__()
+        self.cache = cache
+        self._lock = threading.Lock()
+        self.hits = 0
+        self.revalidated = 0
+        self.misses = 0
+
+    def _count(self, field: str) -> None:
+        with self._lock:
+            setattr(self, field, getattr(self, field) + 1)
+
+    def request(self, method, url, *args, **kwargs):  # type: ignore[override]
+        if method.upper() != "GET" or kwargs.get("params"):
+            return super().request(method, url, *args, **kwargs)
+
+        now = time.time()
+        meta = self.cache.load(url)
+        if meta is not None and now - float(meta.get("fetched_at", 0)) < ttl_for_url(url):
+            self._count("hits")
+            return _cached_response(url, meta)
+
+        headers = dict(kwargs.pop("headers", None) or {})
+        if meta is not None:
+            if meta.get("etag"):
+                headers["If-None-Match"] = meta["etag"]
+            if meta.get("last_modified"):
+                headers["If-Modified-Since"] = meta["last_modified"]
+        response = super().request(method, url, *args, headers=headers, **kwargs)
+
+        if response.status_code == 304 and meta is not None:
+            self._count("revalidated")
+            self.cache.touch(url, meta, now)
+            return _cached_response(url, meta)
+        self._count("misses")
+        if response.status_code == 200:
+            try:
+                self.cache.store(url, response, now)
+            except OSError as exc:
+                logging.warning("HTTP cache write failed for %s: %s", url, exc)
+        return response
+
+
+def _cached_response(url: str, meta: Dict[str, Any]) -> requests.Response:
+    response = requests.Response()
+    response.status_code = 200
+    response.url = url
+    response._content = meta["body"]
+    response.encoding = meta.get("encoding")
+    response.headers = CaseInsensitiveDict(meta.get("headers") or {})
+    response.headers["X-Fical-Cache"] = "hit"
+    return response
@@ -0,0 +1,49 @@
+from __future__ import annotations
+
+import logging
+from pathlib import Path
+from typing import Mapping, Optional
+
+from .build_ics import FeedWriter, calendar_header, render_earnings_block
+from .earnings_table import DEFAULT_LARGE_CAP_MIN, EarningsTable, large_cap_positions
+from .event_state import EventState
+from .render_cache import RenderCache
+
+LARGE_CAP_FEED = "earnings-large-cap.ics"
+
+
+def write_large_cap_feed(
+    dist_dir: Path,
+    table: EarningsTable,
+    min_market_cap: float = DEFAULT_LARGE_CAP_MIN,
+    top_n: int = 0,
+    cache: Optional[RenderCache] = None,
+    state: Optional[EventState] = None,
+    previous_hashes: Optional[Mapping[str, str]] = None,
+) -> FeedWriter:
+    """Write the large-cap subset of ``earnings.ics`` from a date-sorted table.
+
+    Selection runs over the ``market_cap`` column only. Events use the same
+    blocks as the earnings feed, so with a warm ``cache`` nothing is rendered.
+    """
+    previous_hashes = previous_hashes or {}
+    title = "Nasdaq Earnings: large caps"
+    positions = large_cap_positions(table, min_market_cap, top_n)
+    with FeedWriter(
+        Path(dist_dir) / LARGE_CAP_FEED,
+        calendar_header("nasdaq-earnings-large-cap", title),
+        previous_hash=previous_hashes.get(LARGE_CAP_FEED),
+    ) as feed:
+        for i in positions:
+            item = table.items[i]
+            if item.report_date is None:
+                continue
+            feed.write_event(
+                render_earnings_block(item, cache),
+                state.stamp_for("earnings", item) if state else None,
+            )
+    logging.info(
+        "Large-cap earnings feed: %d of %d events with market cap >= %.0f%s",
+        feed.events, len(table), min_market_cap, f" (top {top_n})" if top_n > 0 else "",
+    )
+    return feed
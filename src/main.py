@@ -1,147 +1,479 @@
 from __future__ import annotations
+import argparse
+import json
 import logging
+import os
 from datetime import date
 import shutil
 from pathlib import Path
-from typing import List
-
-from .utils import IpoItem, EarningsItem, configure_logging, json_dump_pretty, month_range, today_utc
-from .fetch import (
-    get_http_session,
-    fetch_nasdaq_json_for_month,
-    fetch_nasdaq_html_calendar,
-    parse_html_fallback,
-    fetch_nasdaq_earnings_json_for_month,
-    fetch_nasdaq_earnings_json_for_day,
+from typing import TYPE_CHECKING, Any, Callable, Dict, Iterable, List, Optional, Tuple
+
+from .utils import (
+    IpoItem,
+    EarningsItem,
+    atomic_write_bytes,
+    configure_logging,
+    days_in_month,
+    env_float,
+    env_int,
+    month_range,
+    shift_month,
+    today_utc,
+)
+from .archive import Archive
+from .earnings_table import DEFAULT_LARGE_CAP_MIN, EarningsTable
+from .event_index import EventDiff, EventIndex
+from .event_state import EventState
+from .metrics import RunMetrics
+from .manifest import MANIFEST_NAME, file_sha256, load_manifest, report_changed, write_manifest
+from .precompress import precompress
+from .render_cache import RenderCache
+from .snapshot_store import SnapshotStore
+from .transform import (
+    date_parse_stats,
+    earnings_table_from_json,
+    normalize_from_json,
+    normalize_from_html_rows,
 )
-from .transform import normalize_from_json, normalize_from_html_rows, normalize_earnings_from_json
-from .build_ics import build_calendar, build_earnings_calendar, build_combined_calendar
+from .build_ics import FeedWriter, write_feeds
+from .fanout import load_fanout_config, remove_fanout, write_fanout
+from .large_cap import write_large_cap_feed
+from .windows import write_window_feeds
+
+if TYPE_CHECKING:
+    import requests
 
 ROOT_DIR = Path(__file__).resolve().parent.parent
-DATA_DIR = ROOT_DIR / "data"
-DIST_DIR = ROOT_DIR / "dist"
+# Both can be redirected (e.g. for replay runs) so the real trees stay untouched
+DATA_DIR = Path(os.environ.get("FICAL_DATA_DIR") or ROOT_DIR / "data")
+DIST_DIR = Path(os.environ.get("FICAL_DIST_DIR") or ROOT_DIR / "dist")
 FUNCTIONS_DIR = ROOT_DIR / "functions"
+HTTP_CACHE_DIR = DATA_DIR / "http_cache"
+RENDER_CACHE_PATH = DATA_DIR / "render_cache.json"
+EVENT_STATE_PATH = DATA_DIR / "event_state.json"
+EVENT_INDEX_PATH = DATA_DIR / "event_index.json"
+FETCH_METRICS_PATH = DATA_DIR / "fetch_metrics.json"
+FEEDS_CONFIG_NAMES = ("feeds.yaml", "feeds.yml", "feeds.json")
+SNAPSHOT_DIR = DATA_DIR / "snapshots"
+ARCHIVE_DIR = DATA_DIR / "archive"
+
+# ingest(kind, shard key, payload)
+Ingest = Callable[[str, str, Dict[str, Any]], None]
+
+
+def load_json_snapshot(path: Path) -> Dict[str, Any]:
+    """Load a previous run's snapshot mapping, or an empty one if unusable."""
+    try:
+        with path.open("r", encoding="utf-8") as f:
+            data = json.load(f)
+    except (OSError, ValueError):
+        return {}
+    return data if isinstance(data, dict) else {}
+
+
+def open_snapshot_store(kind: str) -> SnapshotStore:
+    """Open ``data/snapshots/<kind>``, seeding it once from the legacy ``data/<kind>.json``."""
+    store = SnapshotStore(SNAPSHOT_DIR / kind, compress=env_int("FICAL_SNAPSHOT_GZIP", 0) > 0)
+    legacy_path = DATA_DIR / f"{kind}.json"
+    if not store.exists() and legacy_path.exists():
+        store.write(load_json_snapshot(legacy_path))
+    return store
+
+
+def open_archive(kind: str) -> Archive:
+    """Open the deduplicated run history in ``data/archive/<kind>``, folding in legacy copies."""
+    archive = Archive(ARCHIVE_DIR / kind)
+    archive.import_legacy()
+    return archive
+
+
+def find_fanout_config() -> Optional[Path]:
+    """``FICAL_FEEDS_CONFIG`` if set, else the first ``feeds.{yaml,yml,json}`` in the repo root."""
+    explicit = os.environ.get("FICAL_FEEDS_CONFIG")
+    if explicit:
+        return Path(explicit)
+    for name in FEEDS_CONFIG_NAMES:
+        if (ROOT_DIR / name).exists():
+            return ROOT_DIR / name
+    return None
+
+
+def fetch_payloads(
+    months: List[date],
+    run_date: date,
+    earnings_store: SnapshotStore,
+    ingest: Ingest,
+    metrics: RunMetrics,
+) -> Tuple["requests.Session", bool]:
+    """Fetch the horizon from Nasdaq, passing each payload to ``ingest`` as it arrives.
+
+    The HTTP stack (requests, urllib3, the response cache) is imported here
+    rather than at module load, so an offline ``build`` never pays for it.
+    Returns the session for the HTML fallback and whether the fetch completed
+    (False once the circuit breaker opened or the run deadline passed, or when
+    any planned month or day still failed after retries).
+    """
+    from .fetch import (
+        DEFAULT_MAX_IN_FLIGHT,
+        fetch_nasdaq_earnings_json_for_day,
+        fetch_nasdaq_earnings_json_for_month,
+        fetch_nasdaq_json_for_month,
+        fetch_stream,
+        get_http_session,
+        session_breaker_open,
+    )
+    from .http_cache import CachingSession
+    from .planner import plan_earnings_days
+    from .resilience import SessionPolicy
+
+    max_in_flight = env_int("FICAL_MAX_IN_FLIGHT", DEFAULT_MAX_IN_FLIGHT)
+    policy = SessionPolicy(
+        pool_size=max_in_flight,
+        max_retries=env_int("FICAL_MAX_RETRIES", 3),
+        requests_per_second=env_float("FICAL_RATE_PER_SEC", 5.0),
+        failure_threshold=env_int("FICAL_BREAKER_THRESHOLD", 10),
+        run_deadline=env_float("FICAL_RUN_DEADLINE", 600.0) or None,
+    )
+    # FICAL_HTTP_CACHE=0 bypasses the response cache, so every payload really
+    # comes from the server (reproducible replays and fault injection).
+    cache_dir = HTTP_CACHE_DIR if env_int("FICAL_HTTP_CACHE", 1) > 0 else None
+    session = metrics.watch_session(get_http_session(policy, cache_dir=cache_dir))
+
+    def fetch_month(session: "requests.Session", key: Tuple[str, date]) -> Optional[Dict[str, Any]]:
+        kind, month = key
+        if kind == "ipo":
+            return fetch_nasdaq_json_for_month(session, month)
+        return fetch_nasdaq_earnings_json_for_month(session, month)
+
+    with metrics.stage("fetch"):
+        # IPO and earnings months share one pool; normalization overlaps with in-flight requests.
+        rejected: List[date] = []
+        # Planned shards that never arrived (non-200 or errors after retries)
+        failed: List[str] = []
+        month_keys = [("ipo", m) for m in months] + [("earnings", m) for m in months]
+        for (kind, m), payload in fetch_stream(fetch_month, session, month_keys, max_in_flight):
+            if kind == "ipo":
+                if payload:
+                    ingest("ipo", m.strftime('%Y-%m'), payload)
+                else:
+                    failed.append(f"ipo/{m:%Y-%m}")
+            elif payload and isinstance(payload.get("data"), dict):
+                ingest("earnings", m.strftime('%Y-%m'), payload)
+            else:
+                # Months whose monthly earnings endpoint was rejected fall back to per-day queries
+                rejected.append(m)
+
+        plan = plan_earnings_days(
+            [day for m in rejected for day in days_in_month(m)],
+            earnings_store,
+            run_date,
+        )
+        logging.info(
+            "Earnings day plan: %d to fetch, %d reused, %d skipped",
+            len(plan.fetch), len(plan.reuse), len(plan.skipped),
+        )
+        for day in plan.reuse:
+            # Settled days are read back from their shard one at a time
+            dpayload = earnings_store.get(day.isoformat())
+            if dpayload:
+                ingest("earnings", day.isoformat(), dpayload)
+        for day, dpayload in fetch_stream(fetch_nasdaq_earnings_json_for_day, session, plan.fetch, max_in_flight):
+            if dpayload:
+                ingest("earnings", day.isoformat(), dpayload)
+            else:
+                failed.append(f"earnings/{day.isoformat()}")
+
+    complete = not failed and not session_breaker_open(session)
+    if session_breaker_open(session):
+        # Remaining requests were refused rather than left to time out one by one.
+        logging.warning("Nasdaq fetch stopped early (circuit open or run deadline reached); using partial data")
+    elif failed:
+        logging.warning("%d planned payloads failed: %s", len(failed), ", ".join(failed[:10]))
+
+    if isinstance(session, CachingSession):
+        logging.info(
+            "HTTP cache: %d fresh hits, %d revalidated, %d fetched",
+            session.hits, session.revalidated, session.misses,
+        )
+    return session, complete
+
+
+def carry_over_shards(
+    stores: Iterable[Tuple[SnapshotStore, str, List[str]]],
+    months: List[date],
+    ingest: Ingest,
+) -> int:
+    """Ingest the previous run's shards for every horizon month or day not fetched now.
 
+    ``stores`` holds ``(store, kind, keys fetched this run)``. A month shard is
+    skipped when any shard of that month was fetched, and a day shard when the
+    day or its month was, so fresh and stale rows for the same period do not
+    mix. Returns the number of shards carried over.
+    """
+    horizon = {m.strftime("%Y-%m") for m in months}
+    carried = 0
+    for store, kind, keys in stores:
+        fetched = set(keys)
+        fetched_months = {key[:7] for key in fetched}
+        for key in store.latest_keys():
+            month = key[:7]
+            if month not in horizon or key in fetched or month in fetched:
+                continue
+            if key == month and month in fetched_months:
+                continue
+            payload = store.get(key)
+            if payload:
+                ingest(kind, key, payload)
+                carried += 1
+    return carried
 
-def unique_by_uid(items: List[IpoItem]) -> List[IpoItem]:
-    seen = set()
-    out: List[IpoItem] = []
-    for item in items:
-        uid = item.uid()
-        if uid in seen:
-            continue
-        seen.add(uid)
-        out.append(item)
-    return out
 
+def run(fetch: bool = True, build: bool = True) -> int:
+    """Fetch into the snapshot store and/or build ``dist/`` from what was ingested.
 
-def main() -> int:
+    With ``fetch`` off, the payloads of the latest stored run are replayed
+    from ``data/snapshots`` instead, so feeds can be rebuilt offline.
+    """
     configure_logging()
+    profile_path = os.environ.get("FICAL_PROFILE")
+    metrics = RunMetrics(
+        trace_memory=env_int("FICAL_TRACEMALLOC", 0) > 0,
+        profile_path=Path(profile_path) if profile_path else None,
+    ).start()
     DATA_DIR.mkdir(parents=True, exist_ok=True)
-    DIST_DIR.mkdir(parents=True, exist_ok=True)
-    # Ensure Pages Functions ship with the built artifacts so Cloudflare picks them up.
-    functions_dest = DIST_DIR / "functions"
-    if functions_dest.exists():
-        shutil.rmtree(functions_dest)
-    if FUNCTIONS_DIR.exists():
-        shutil.copytree(FUNCTIONS_DIR, functions_dest)
-
-    session = get_http_session()
-
-    # Fetch 3-month horizon (current + next 2 months)
-    months = month_range(date(today_utc().year, today_utc().month, 1), 3)
-
-    all_items: List[IpoItem] = []
-    json_snapshots = {}
-    earnings_items: List[EarningsItem] = []
-    earnings_snapshots = {}
-
-    for m in months:
-        payload = fetch_nasdaq_json_for_month(session, m)
-        if payload:
-            json_snapshots[m.strftime('%Y-%m')] = payload
-            items = normalize_from_json(payload)
-            all_items.extend(items)
-
-        # Try monthly earnings; if rejected, fallback to per-day within month
-        epayload = fetch_nasdaq_earnings_json_for_month(session, m)
-        if epayload and isinstance(epayload.get("data"), dict):
-            earnings_snapshots[m.strftime('%Y-%m')] = epayload
-            eitems = normalize_earnings_from_json(epayload)
-            earnings_items.extend(eitems)
+    if build:
+        DIST_DIR.mkdir(parents=True, exist_ok=True)
+        # Ensure Pages Functions ship with the built artifacts so Cloudflare picks them up.
+        functions_dest = DIST_DIR / "functions"
+        if functions_dest.exists():
+            shutil.rmtree(functions_dest)
+        if FUNCTIONS_DIR.exists():
+            shutil.copytree(FUNCTIONS_DIR, functions_dest)
+
+    ipo_store = open_snapshot_store("ipo")
+    earnings_store = open_snapshot_store("earnings")
+
+    # Horizon: the current month plus FICAL_HORIZON_PAST_MONTHS before and
+    # FICAL_HORIZON_FUTURE_MONTHS after it (default: current + next 2 months)
+    past_months = max(env_int("FICAL_HORIZON_PAST_MONTHS", 0), 0)
+    future_months = max(env_int("FICAL_HORIZON_FUTURE_MONTHS", 2), 0)
+    months = month_range(shift_month(today_utc(), -past_months), past_months + 1 + future_months)
+
+    # Streaming ingest: each payload is spilled to its snapshot shard and archive
+    # object, normalized and upserted into the event index as soon as it
+    # arrives, and then dropped, so only compact items accumulate as the
+    # horizon grows.
+    run_date = today_utc()
+    ipo_archive = open_archive("ipo") if fetch else None
+    earnings_archive = open_archive("earnings") if fetch else None
+    index = EventIndex(EVENT_INDEX_PATH).load()
+    ipo_keys: List[str] = []
+    earnings_keys: List[str] = []
+    raw_counts = {"ipo": 0, "earnings": 0}
+    complete = True
+    # Earnings rows with their numeric columns (market cap, EPS, surprise, ...)
+    earnings_table = EarningsTable()
+
+    def ingest(kind: str, key: str, payload: Dict[str, Any]) -> None:
+        store, archive, keys = (
+            (ipo_store, ipo_archive, ipo_keys) if kind == "ipo"
+            else (earnings_store, earnings_archive, earnings_keys)
+        )
+        if archive is not None:
+            with metrics.stage("spill"):
+                archive.add(run_date, key, store.put(key, payload))
+        keys.append(key)
+        if not build:
+            return
+        with metrics.stage("normalize"):
+            if kind == "ipo":
+                normalized = normalize_from_json(payload)
+            else:
+                table = earnings_table_from_json(payload)
+                earnings_table.extend(table)
+                normalized = table.items
+            raw_counts[kind] += len(normalized)
+            for item in normalized:
+                index.upsert(kind, item)
+
+    if not fetch:
+        with metrics.stage("load"):
+            for kind, store in (("ipo", ipo_store), ("earnings", earnings_store)):
+                for key in store.latest_keys():
+                    payload = store.get(key)
+                    if payload:
+                        ingest(kind, key, payload)
+        logging.info(
+            "Replaying stored snapshots: %d IPO and %d earnings payloads",
+            len(ipo_keys), len(earnings_keys),
+        )
+        if not ipo_keys and not earnings_keys:
+            logging.warning("No stored snapshots in %s; run the fetch step first", SNAPSHOT_DIR)
+    else:
+        session, complete = fetch_payloads(months, run_date, earnings_store, ingest, metrics)
+        if not complete:
+            # Months and days that did not arrive are taken from the previous
+            # run, so a failed fetch never commits or publishes a partial set.
+            with metrics.stage("load"):
+                carried = carry_over_shards(
+                    ((ipo_store, "ipo", ipo_keys), (earnings_store, "earnings", earnings_keys)),
+                    months, ingest,
+                )
+            logging.warning("Partial fetch: reused %d shards from the previous run", carried)
+        with metrics.stage("snapshots"):
+            # Shards were written as they arrived; record which ones make up this run
+            ipo_store.commit(ipo_keys)
+            earnings_store.commit(earnings_keys)
+            ipo_archive.commit(run_date)  # type: ignore[union-attr]
+            earnings_archive.commit(run_date)  # type: ignore[union-attr]
+
+    if not build:
+        # A fetch-only run leaves dist/ alone; its metrics stay with the data
+        metrics.finish(FETCH_METRICS_PATH)
+        return 0
+
+    if fetch and not raw_counts["ipo"]:
+        from .fetch import fetch_nasdaq_html_calendar, parse_html_fallback
+
+        with metrics.stage("html_fallback"):
+            html = fetch_nasdaq_html_calendar(session)
+            if html:
+                rows = parse_html_fallback(html)
+                normalized = normalize_from_html_rows(rows)
+                raw_counts["ipo"] += len(normalized)
+                for item in normalized:
+                    index.upsert("ipo", item)
+
+    logging.info("Date parsing: %s", date_parse_stats())
+
+    with metrics.stage("index"):
+        # One event per company and date (reschedules and duplicate listings merged), by date then name
+        items: List[IpoItem] = index.items("ipo")  # type: ignore[assignment]
+        earnings_items: List[EarningsItem] = index.items("earnings")  # type: ignore[assignment]
+        earnings_table = earnings_table.align(earnings_items)
+        if complete:
+            changes = index.diff(horizon_start=months[0])
+            index.save()
         else:
-            # Iterate days in month, stop early if API starts rejecting too much
-            from calendar import monthrange as cal_monthrange
-            year, month = m.year, m.month
-            ndays = cal_monthrange(year, month)[1]
-            for d in range(1, ndays + 1):
-                from datetime import date as _date
-                day = _date(year, month, d)
-                dpayload = fetch_nasdaq_earnings_json_for_day(session, day)
-                if not dpayload:
-                    continue
-                earnings_snapshots[day.isoformat()] = dpayload
-                eitems = normalize_earnings_from_json(dpayload)
-                earnings_items.extend(eitems)
-
-    if not all_items:
-        html = fetch_nasdaq_html_calendar(session)
-        if html:
-            rows = parse_html_fallback(html)
-            all_items = normalize_from_html_rows(rows)
-
-    # Keep only items with an expected date
-    all_items = [i for i in all_items if i.expected_date is not None]
-    earnings_items = [e for e in earnings_items if e.report_date is not None]
-
-    # Deduplicate by UID
-    items = unique_by_uid(all_items)
-    def unique_earnings_by_uid(es: List[EarningsItem]) -> List[EarningsItem]:
-        seen = set()
-        out: List[EarningsItem] = []
-        for it in es:
-            uid = it.uid()
-            if uid in seen:
-                continue
-            seen.add(uid)
-            out.append(it)
-        return out
-    earnings_items = unique_earnings_by_uid(earnings_items)
-
-    # Sort by date then company name
-    items.sort(key=lambda i: (i.expected_date or date.max, i.company_name))
-    earnings_items.sort(key=lambda e: (e.report_date or date.max, e.company_name))
-
-    # Write latest JSON snapshots
-    latest_path = DATA_DIR / "ipo.json"
-    with latest_path.open("w", encoding="utf-8") as f:
-        f.write(json_dump_pretty(json_snapshots))
-    latest_earnings_path = DATA_DIR / "earnings.json"
-    with latest_earnings_path.open("w", encoding="utf-8") as f:
-        f.write(json_dump_pretty(earnings_snapshots))
-
-    # Build ICS
-    ics = build_calendar(items)
-    ics_path = DIST_DIR / "ipo.ics"
-    with ics_path.open("w", encoding="utf-8", newline="") as f:
-        f.write(ics)
-
-    earnings_ics = build_earnings_calendar(earnings_items)
-    earnings_ics_path = DIST_DIR / "earnings.ics"
-    with earnings_ics_path.open("w", encoding="utf-8", newline="") as f:
-        f.write(earnings_ics)
-
-    # Build combined ICS with prefixed summaries for disambiguation
-    all_ics = build_combined_calendar(items, earnings_items)
-    all_ics_path = DIST_DIR / "all.ics"
-    with all_ics_path.open("w", encoding="utf-8", newline="") as f:
-        f.write(all_ics)
-
-    logging.info("Generated %s with %d events", ics_path, len(items))
-    logging.info("Generated %s with %d events", earnings_ics_path, len(earnings_items))
-    logging.info("Generated %s with %d events", all_ics_path, len(items) + len(earnings_items))
+            # Unfetched months would show up as mass removals; keep the last
+            # complete run's index so the next full run diffs against it.
+            changes = EventDiff()
+    metrics.count("ipo_rows", raw_counts["ipo"])
+    metrics.count("earnings_rows", raw_counts["earnings"])
+    metrics.count("ipo_unique", len(items))
+    metrics.count("earnings_unique", len(earnings_items))
+    for name, entries in changes.as_dict().items():
+        metrics.count(f"events_{name}", len(entries))
+    if complete:
+        atomic_write_bytes(DIST_DIR / "changes.json", json.dumps(changes.as_dict(), indent=1).encode("utf-8"))
+        logging.info(
+            "Events since the previous run: %d added, %d changed, %d removed",
+            len(changes.added), len(changes.changed), len(changes.removed),
+        )
+    else:
+        logging.warning("Partial fetch: event index and changes.json left as they were")
+
+    # Stream all three ICS feeds in one merged pass; each event is rendered once.
+    # Feeds whose content (ignoring DTSTAMP) matches the previous build are not rewritten.
+    manifest_path = DIST_DIR / MANIFEST_NAME
+    previous_hashes = load_manifest(manifest_path)
+    render_cache = RenderCache(RENDER_CACHE_PATH).load()
+    event_state = EventState(EVENT_STATE_PATH).load()
+    with metrics.stage("render"):
+        feeds = write_feeds(
+            items,
+            earnings_items,
+            DIST_DIR / "ipo.ics",
+            DIST_DIR / "earnings.ics",
+            DIST_DIR / "all.ics",
+            cache=render_cache,
+            previous_hashes=previous_hashes,
+            state=event_state,
+        )
+
+        # Optional per-symbol / per-exchange / watchlist feeds, sharing the same rendered blocks
+        config_path = find_fanout_config()
+        fanout_config = load_fanout_config(config_path) if config_path else None
+        fanout_feeds: List[FeedWriter] = []
+        if fanout_config is not None:
+            fanout_feeds = write_fanout(
+                DIST_DIR, items, earnings_items, fanout_config,
+                cache=render_cache, state=event_state, previous_hashes=previous_hashes,
+            )
+        else:
+            remove_fanout(DIST_DIR)
+
+        # Small next-7/next-30-day and per-month slices of the combined feed for frequent pollers
+        window_feeds = write_window_feeds(
+            DIST_DIR, items, earnings_items, today_utc(), months,
+            cache=render_cache, state=event_state, previous_hashes=previous_hashes,
+        )
+
+        # Earnings of the largest companies, selected over the market-cap column
+        large_cap_feed = write_large_cap_feed(
+            DIST_DIR, earnings_table,
+            min_market_cap=env_float("FICAL_LARGE_CAP_MIN", DEFAULT_LARGE_CAP_MIN),
+            top_n=env_int("FICAL_LARGE_CAP_TOP", 0),
+            cache=render_cache, state=event_state, previous_hashes=previous_hashes,
+        )
+        feeds.append(large_cap_feed)
+
+        render_cache.save(horizon_start=months[0])
+        event_state.save()
+    metrics.count("render_cache_hits", render_cache.hits)
+    metrics.count("render_cache_misses", render_cache.misses)
+    for feed in feeds + window_feeds:
+        metrics.count("events:" + feed.path.relative_to(DIST_DIR).as_posix(), feed.events)
+    metrics.count("fanout_feeds", len(fanout_feeds))
+
+    with metrics.stage("finalize"):
+        artifacts: Dict[str, str] = {}
+        encodings: Dict[str, List[str]] = {}
+        for feed in feeds + window_feeds:
+            name = feed.path.relative_to(DIST_DIR).as_posix()
+            artifacts[name] = feed.sha256
+            variants = precompress(feed.path, force=feed.changed)
+            encodings[f"/{name}"] = sorted(variants)
+            for target in variants.values():
+                artifacts[target.relative_to(DIST_DIR).as_posix()] = file_sha256(target)
+        for feed in fanout_feeds:
+            artifacts[feed.path.relative_to(DIST_DIR).as_posix()] = feed.sha256
+        for path in sorted(functions_dest.rglob("*")):
+            if path.is_file():
+                artifacts[path.relative_to(DIST_DIR).as_posix()] = file_sha256(path)
+        changed = [name for name, digest in artifacts.items() if previous_hashes.get(name) != digest]
+        changed += [name for name in previous_hashes if name not in artifacts]
+        etags = {"/" + feed.path.relative_to(DIST_DIR).as_posix(): feed.etag for feed in feeds + window_feeds + fanout_feeds}
+        write_manifest(manifest_path, artifacts, changed, etags, encodings)
+        report_changed(changed)
+
+    for feed in feeds:
+        logging.info(
+            "Generated %s with %d events%s",
+            feed.path, feed.events, "" if feed.changed else " (unchanged, not rewritten)",
+        )
+    logging.info(
+        "Generated %d window feeds (%d rewritten)",
+        len(window_feeds), sum(1 for feed in window_feeds if feed.changed),
+    )
+    if fanout_feeds:
+        logging.info(
+            "Generated %d fan-out feeds (%d rewritten)",
+            len(fanout_feeds), sum(1 for feed in fanout_feeds if feed.changed),
+        )
+    metrics.finish(DIST_DIR / "metrics.json")
     return 0
 
 
+def main(argv: Optional[List[str]] = None) -> int:
+    parser = argparse.ArgumentParser(prog="python -m src.main", description="Build the Nasdaq IPO and earnings ICS feeds.")
+    commands = parser.add_subparsers(dest="command", metavar="{fetch,build,all}")
+    commands.add_parser("fetch", help="download the horizon into data/snapshots and data/archive only")
+    commands.add_parser("build", help="regenerate dist/ offline from the latest stored snapshots")
+    commands.add_parser("all", help="fetch, then build (the default)")
+    command = parser.parse_args(argv).command or "all"
+    return run(fetch=command in ("fetch", "all"), build=command in ("build", "all"))
+
+
 if __name__ == "__main__":
     raise SystemExit(main())
@@ -0,0 +1,66 @@
+from __future__ import annotations
+
+import hashlib
+import json
+import logging
+import os
+from pathlib import Path
+from typing import Dict, List, Optional
+
+from .utils import atomic_write_bytes
+
+MANIFEST_NAME = "manifest.json"
+
+
+def file_sha256(path: Path) -> str:
+    digest = hashlib.sha256()
+    with Path(path).open("rb") as f:
+        for chunk in iter(lambda: f.read(1 << 16), b""):
+            digest.update(chunk)
+    return digest.hexdigest()
+
+
+def load_manifest(path: Path) -> Dict[str, str]:
+    """Artifact name -> content hash from the previous build, or empty."""
+    try:
+        with Path(path).open("r", encoding="utf-8") as f:
+            manifest = json.load(f)
+    except (OSError, ValueError):
+        return {}
+    artifacts = manifest.get("artifacts") if isinstance(manifest, dict) else None
+    return dict(artifacts) if isinstance(artifacts, dict) else {}
+
+
+def write_manifest(
+    path: Path,
+    artifacts: Dict[str, str],
+    changed: List[str],
+    etags: Optional[Dict[str, str]] = None,
+    encodings: Optional[Dict[str, List[str]]] = None,
+) -> None:
+    """Record artifact hashes plus what the edge middleware needs.
+
+    ``etags`` maps served paths (``/all.ics``) to strong ETags; ``encodings``
+    maps them to the precompressed variants available next to the file.
+    """
+    body = {
+        "artifacts": dict(sorted(artifacts.items())),
+        "changed": sorted(changed),
+        "encodings": dict(sorted((encodings or {}).items())),
+        "etags": dict(sorted((etags or {}).items())),
+    }
+    atomic_write_bytes(Path(path), json.dumps(body, indent=2, sort_keys=True).encode("utf-8"))
+
+
+def report_changed(changed: List[str]) -> None:
+    """Log what changed and expose ``changed=true|false`` to GitHub Actions."""
+    if changed:
+        names = sorted(changed)
+        more = f" (+{len(names) - 20} more)" if len(names) > 20 else ""
+        logging.info("Changed artifacts (%d): %s%s", len(names), ", ".join(names[:20]), more)
+    else:
+        logging.info("No artifact changed since the previous build")
+    output = os.environ.get("GITHUB_OUTPUT")
+    if output:
+        with open(output, "a", encoding="utf-8") as f:
+            f.write(f"changed={'true' if changed else 'false'}\n")
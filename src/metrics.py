@@ -0,0 +1,157 @@
+from __future__ import annotations
+
+import json
+import logging
+import threading
+import time
+from contextlib import contextmanager
+from pathlib import Path
+from typing import TYPE_CHECKING, Any, Dict, Iterator, List, Optional
+
+from .utils import atomic_write_bytes, utc_now
+
+try:  # not available on Windows
+    import resource
+except ImportError:  # pragma: no cover - depends on platform
+    resource = None
+
+if TYPE_CHECKING:
+    import cProfile
+
+    import requests
+
+
+class RunMetrics:
+    """Timings and counters for one run, written to ``dist/metrics.json``.
+
+    ``stage(name)`` records wall and CPU time of a block, ``count`` stores item
+    counts, and ``watch_session`` logs latency, status and size of every HTTP
+    request made through a session (cache hits included). Peak memory comes
+    from ``ru_maxrss``, plus the tracemalloc peak when ``trace_memory`` is set.
+    With ``profile_path`` the whole run is profiled with cProfile and the stats
+    are dumped there for ``python -m pstats`` or snakeviz.
+    """
+
+    def __init__(self, trace_memory: bool = False, profile_path: Optional[Path] = None) -> None:
+        self.trace_memory = trace_memory
+        self.profile_path = Path(profile_path) if profile_path else None
+        self.stages: Dict[str, Dict[str, float]] = {}
+        self.counts: Dict[str, int] = {}
+        self.requests: List[Dict[str, Any]] = []
+        self._lock = threading.Lock()
+        self._profiler: Optional[cProfile.Profile] = None
+        # Wall/CPU seconds spent in child stages, one entry per open stage
+        self._nested: List[List[float]] = []
+        self._started_at = ""
+        self._wall = 0.0
+        self._cpu = 0.0
+
+    def start(self) -> "RunMetrics":
+        self._started_at = utc_now().isoformat(timespec="seconds")
+        self._wall = time.perf_counter()
+        self._cpu = time.process_time()
+        # Profiling and tracing modules are only imported when enabled
+        if self.trace_memory:
+            import tracemalloc
+
+            tracemalloc.start()
+        if self.profile_path:
+            import cProfile
+
+            self._profiler = cProfile.Profile()
+            self._profiler.enable()
+        return self
+
+    @contextmanager
+    def stage(self, name: str) -> Iterator[None]:
+        """Time a block. Stages may nest; a stage's time excludes the stages
+        nested inside it, so the stage totals never exceed the run's wall time."""
+        wall, cpu = time.perf_counter(), time.process_time()
+        nested = [0.0, 0.0]
+        self._nested.append(nested)
+        try:
+            yield
+        finally:
+            self._nested.pop()
+            wall, cpu = time.perf_counter() - wall, time.process_time() - cpu
+            if self._nested:
+                self._nested[-1][0] += wall
+                self._nested[-1][1] += cpu
+            entry = self.stages.setdefault(name, {"wall_s": 0.0, "cpu_s": 0.0})
+            entry["wall_s"] += wall - nested[0]
+            entry["cpu_s"] += cpu - nested[1]
+
+    def count(self, name: str, value: int) -> None:
+        self.counts[name] = value
+
+    def watch_session(self, session: requests.Session) -> requests.Session:
+        """Record every request made through ``session``; returns the session."""
+        send = session.request
+
+        def request(method, url, *args, **kwargs):  # type: ignore[no-untyped-def]
+            start = time.perf_counter()
+            entry: Dict[str, Any] = {"method": method.upper(), "url": url}
+            try:
+                response = send(method, url, *args, **kwargs)
+            except Exception as exc:
+                entry.update(error=type(exc).__name__)
+                raise
+            else:
+                entry.update(
+                    status=response.status_code,
+                    bytes=len(response.content or b""),
+                    cache=response.headers.get("X-Fical-Cache", "miss"),
+                )
+                return response
+            finally:
+                entry["seconds"] = round(time.perf_counter() - start, 4)
+                with self._lock:
+                    self.requests.append(entry)
+
+        session.request = request  # type: ignore[method-assign]
+        return session
+
+    def finish(self, path: Path) -> Dict[str, Any]:
+        """Stop profiling/tracing and write the metrics JSON to ``path``."""
+        if self._profiler is not None:
+            self._profiler.disable()
+            self.profile_path.parent.mkdir(parents=True, exist_ok=True)
+            self._profiler.dump_stats(str(self.profile_path))
+            logging.info("cProfile stats written to %s", self.profile_path)
+        memory: Dict[str, Any] = {}
+        if resource is not None:
+            # ru_maxrss is in KiB on Linux
+            memory["max_rss_kib"] = resource.getrusage(resource.RUSAGE_SELF).ru_maxrss
+        if self.trace_memory:
+            import tracemalloc
+
+            if tracemalloc.is_tracing():
+                memory["tracemalloc_peak_bytes"] = tracemalloc.get_traced_memory()[1]
+                tracemalloc.stop()
+
+        latencies = sorted(r["seconds"] for r in self.requests)
+        http = {
+            "requests": len(self.requests),
+            "bytes": sum(r.get("bytes", 0) for r in self.requests),
+            "errors": sum(1 for r in self.requests if "error" in r or r.get("status") != 200),
+            "cache_hits": sum(1 for r in self.requests if r.get("cache") == "hit"),
+            "latency_p50_s": latencies[len(latencies) // 2] if latencies else None,
+            "latency_max_s": latencies[-1] if latencies else None,
+        }
+        report = {
+            "started_at": self._started_at,
+            "wall_s": round(time.perf_counter() - self._wall, 4),
+            "cpu_s": round(time.process_time() - self._cpu, 4),
+            "stages": {k: {f: round(v, 4) for f, v in s.items()} for k, s in self.stages.items()},
+            "counts": self.counts,
+            "memory": memory,
+            "http": http,
+            "requests": self.requests,
+        }
+        atomic_write_bytes(Path(path), json.dumps(report, indent=1).encode("utf-8"))
+        logging.info(
+            "Run took %.2fs wall / %.2fs CPU; stages: %s",
+            report["wall_s"], report["cpu_s"],
+            ", ".join(f"{k} {v['wall_s']:.2f}s" for k, v in report["stages"].items()),
+        )
+        return report
@@ -0,0 +1,125 @@
+from __future__ import annotations
+
+from dataclasses import dataclass, field
+from datetime import date, timedelta
+from functools import lru_cache
+from typing import Any, Dict, FrozenSet, Iterable, List, Mapping, Optional
+
+from dateutil.easter import easter
+
+from .transform import normalize_earnings_from_json
+
+# Past days are re-fetched while actual EPS is still missing, but only for this
+# long; some rows never get an actual and would otherwise be polled forever.
+SETTLE_AFTER_DAYS = 14
+# Weekend/holiday days this close to today are always checked: the rare
+# off-session reports (e.g. Berkshire on a Saturday) get scheduled late.
+NON_TRADING_LOOKAHEAD_DAYS = 7
+
+
+def _nth_weekday(year: int, month: int, weekday: int, n: int) -> date:
+    first = date(year, month, 1)
+    offset = (weekday - first.weekday()) % 7
+    return first + timedelta(days=offset + 7 * (n - 1))
+
+
+def _last_weekday(year: int, month: int, weekday: int) -> date:
+    last = (date(year, month + 1, 1) if month < 12 else date(year + 1, 1, 1)) - timedelta(days=1)
+    return last - timedelta(days=(last.weekday() - weekday) % 7)
+
+
+def _observed(d: date) -> date:
+    if d.weekday() == 5:
+        return d - timedelta(days=1)
+    if d.weekday() == 6:
+        return d + timedelta(days=1)
+    return d
+
+
+@lru_cache(maxsize=None)
+def us_market_holidays(year: int) -> FrozenSet[date]:
+    """Full-day NYSE/Nasdaq closures for ``year`` (early closes are trading days)."""
+    holidays = {
+        _nth_weekday(year, 1, 0, 3),  # Martin Luther King Jr. Day
+        _nth_weekday(year, 2, 0, 3),  # Washington's Birthday
+        easter(year) - timedelta(days=2),  # Good Friday
+        _last_weekday(year, 5, 0),  # Memorial Day
+        _observed(date(year, 7, 4)),
+        _nth_weekday(year, 9, 0, 1),  # Labor Day
+        _nth_weekday(year, 11, 3, 4),  # Thanksgiving
+        _observed(date(year, 12, 25)),
+    }
+    # New Year's Day falling on a Saturday is not observed on the prior Friday.
+    new_year = date(year, 1, 1)
+    if new_year.weekday() != 5:
+        holidays.add(_observed(new_year))
+    if year >= 2022:
+        holidays.add(_observed(date(year, 6, 19)))  # Juneteenth
+    return frozenset(holidays)
+
+
+def is_trading_day(d: date) -> bool:
+    return d.weekday() < 5 and d not in us_market_holidays(d.year)
+
+
+def _is_settled(payload: Dict[str, Any]) -> bool:
+    """True when every earnings row in a day payload already has an actual EPS."""
+    return all(item.eps_actual for item in normalize_earnings_from_json(payload))
+
+
+def _has_rows(payload: Dict[str, Any]) -> bool:
+    data = payload.get("data") if isinstance(payload, dict) else None
+    return isinstance(data, dict) and bool(data.get("rows"))
+
+
+@dataclass
+class DayPlan:
+    """Outcome of :func:`plan_earnings_days`.
+
+    ``fetch`` lists the days to request. ``reuse`` lists days that are not
+    re-fetched but whose previous payload still belongs in the output; it is
+    read back from ``previous`` when needed rather than held in the plan.
+    ``skipped`` lists days that are neither fetched nor reused.
+    """
+
+    fetch: List[date] = field(default_factory=list)
+    reuse: List[date] = field(default_factory=list)
+    skipped: List[date] = field(default_factory=list)
+
+
+def plan_earnings_days(
+    days: Iterable[date],
+    previous: Optional[Mapping[str, Any]],
+    today: date,
+) -> DayPlan:
+    """Decide which per-day earnings payloads actually need a request.
+
+    ``previous`` maps ISO day or ``YYYY-MM`` keys to earlier raw payloads,
+    e.g. the earnings :class:`SnapshotStore`, which loads each day lazily.
+    Rules, per day:
+
+    * past day with a previous payload: reuse it once every row has an actual
+      EPS or the day is older than ``SETTLE_AFTER_DAYS``; otherwise re-fetch;
+    * weekend/holiday not seen before, close to today, or that had rows last
+      time: fetch (or reuse if settled); otherwise skip;
+    * every other day: fetch.
+    """
+    previous = previous or {}
+    plan = DayPlan()
+    for day in days:
+        prior = previous.get(day.isoformat())
+        if not isinstance(prior, dict):
+            prior = None
+
+        if not is_trading_day(day):
+            near = abs((day - today).days) <= NON_TRADING_LOOKAHEAD_DAYS
+            if prior is not None and not near and not _has_rows(prior):
+                plan.skipped.append(day)
+                continue
+
+        if prior is not None and day < today:
+            if (today - day).days > SETTLE_AFTER_DAYS or _is_settled(prior):
+                plan.reuse.append(day)
+                continue
+        plan.fetch.append(day)
+    return plan
@@ -0,0 +1,72 @@
+from __future__ import annotations
+
+import gzip
+import logging
+from pathlib import Path
+from typing import Callable, Dict, List, Tuple
+
+from .utils import atomic_write_bytes
+
+try:  # optional: pip install brotli
+    import brotli
+except ImportError:  # pragma: no cover - depends on environment
+    brotli = None
+
+try:  # optional: pip install zstandard
+    import zstandard
+except ImportError:  # pragma: no cover - depends on environment
+    zstandard = None
+
+
+def _gzip(data: bytes) -> bytes:
+    # mtime=0 keeps the output deterministic so unchanged feeds give identical .gz files.
+    return gzip.compress(data, compresslevel=9, mtime=0)
+
+
+def _brotli(data: bytes) -> bytes:
+    return brotli.compress(data, quality=11, mode=brotli.MODE_TEXT)
+
+
+def _zstd(data: bytes) -> bytes:
+    return zstandard.ZstdCompressor(level=19).compress(data)
+
+
+ALL_SUFFIXES = (".gz", ".br", ".zst")
+
+
+def available_encodings() -> List[Tuple[str, str, Callable[[bytes], bytes]]]:
+    """(Content-Encoding, file suffix, compressor) triples usable in this environment."""
+    encodings = [("gzip", ".gz", _gzip)]
+    if brotli is not None:
+        encodings.append(("br", ".br", _brotli))
+    if zstandard is not None:
+        encodings.append(("zstd", ".zst", _zstd))
+    return encodings
+
+
+def precompress(path: Path, force: bool = False) -> Dict[str, Path]:
+    """Write compressed siblings of ``path`` (``all.ics.gz`` etc.) at maximum level.
+
+    Siblings are only regenerated when ``force`` is set (the source changed)
+    or they are missing. Returns Content-Encoding -> sibling path.
+    """
+    path = Path(path)
+    data = None
+    out: Dict[str, Path] = {}
+    encodings = available_encodings()
+    # Drop siblings this environment can no longer refresh so they never go stale.
+    active = {suffix for _, suffix, _ in encodings}
+    for suffix in ALL_SUFFIXES:
+        if suffix not in active:
+            path.with_name(path.name + suffix).unlink(missing_ok=True)
+    for encoding, suffix, compress in encodings:
+        target = path.with_name(path.name + suffix)
+        out[encoding] = target
+        if target.exists() and not force:
+            continue
+        if data is None:
+            data = path.read_bytes()
+        blob = compress(data)
+        atomic_write_bytes(target, blob)
+        logging.info("Compressed %s: %d -> %d bytes (%s)", path.name, len(data), len(blob), encoding)
+    return out
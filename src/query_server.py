@@ -0,0 +1,449 @@
+"""Filtered ICS feeds served on demand from the stored snapshots.
+
+Run ``python -m src.query_server --port 8766`` and subscribe to, e.g.::
+
+    http://127.0.0.1:8766/calendar.ics?symbols=AAPL,MSFT
+    http://127.0.0.1:8766/calendar.ics?category=earnings&time=bmo&from=2025-11-01&to=2025-11-30
+    http://127.0.0.1:8766/calendar.ics?category=ipo&exchange=nasdaq
+    http://127.0.0.1:8766/calendar.ics?min_market_cap=10000000000
+
+Events are the latest stored run's payloads, normalized and deduplicated as in
+``python -m src.main build``, and rendered as in ``dist/all.ics``. Responses are
+kept in an LRU cache keyed by the normalized query and carry an ETag, so a
+client polling with ``If-None-Match`` gets a bodiless 304.
+"""
+from __future__ import annotations
+
+import argparse
+import asyncio
+import gzip
+import hashlib
+import json
+import logging
+from bisect import bisect_left, bisect_right
+from collections import OrderedDict, defaultdict
+from dataclasses import dataclass, field, replace
+from datetime import date
+from pathlib import Path
+from typing import Any, Dict, List, Mapping, Optional, Tuple, Union
+from urllib.parse import parse_qs, urlencode, urlsplit
+
+from .build_ics import CRLF, apply_stamp, calendar_header, ical_escape, render_combined_block
+from .earnings_table import EarningsTable
+from .event_index import EventIndex
+from .snapshot_store import SnapshotStore
+from .transform import earnings_table_from_json, normalize_from_json
+from .utils import EarningsItem, IpoItem, configure_logging, env_int, utc_now
+
+ROOT_DIR = Path(__file__).resolve().parent.parent
+DATA_DIR = ROOT_DIR / "data"
+FEED_PATH = "/calendar.ics"
+# Total bytes of rendered responses (identity plus gzip) kept in the LRU
+DEFAULT_CACHE_MB = 64
+# Requests whose headers exceed this are rejected
+MAX_HEADER_BYTES = 16 * 1024
+KEEPALIVE_TIMEOUT = 30.0
+CATEGORIES = ("ipo", "earnings")
+TIMES = ("bmo", "amc", "tbd")
+STATUSES = ("upcoming", "priced")
+# Nasdaq reports the time of day in several spellings
+_TIME_CLASSES = {"BMO": "bmo", "TIME-PRE-MARKET": "bmo", "AMC": "amc", "TIME-AFTER-HOURS": "amc"}
+_REASONS = {200: "OK", 304: "Not Modified", 400: "Bad Request", 404: "Not Found", 405: "Method Not Allowed"}
+
+Item = Union[IpoItem, EarningsItem]
+
+
+class QueryError(ValueError):
+    """A query parameter that cannot be understood; answered with 400."""
+
+
+def _stored_payloads(kind: str, data_dir: Path) -> Mapping[str, Any]:
+    """The latest run's payloads of one kind, or the legacy ``data/<kind>.json`` blob."""
+    store = SnapshotStore(data_dir / "snapshots" / kind)
+    if store.exists():
+        return {key: store.get(key) for key in store.latest_keys()}
+    try:
+        with (data_dir / f"{kind}.json").open("r", encoding="utf-8") as f:
+            blob = json.load(f)
+    except (OSError, ValueError):
+        return {}
+    return blob if isinstance(blob, dict) else {}
+
+
+class EventStore:
+    """Deduplicated events in combined-feed order, indexed for queries.
+
+    ``days`` is sorted for ``bisect`` date ranges, ``by_symbol`` and
+    ``by_category`` map to ascending positions, and market caps line up with
+    the earnings positions. Rendered blocks are memoized per position and
+    stamped with the load time.
+    """
+
+    def __init__(self, ipo_items: List[IpoItem], earnings_table: EarningsTable) -> None:
+        self.loaded_at = utc_now().strftime("%Y%m%dT%H%M%SZ")
+        merged: List[Tuple[date, int, int]] = sorted(
+            [(i.expected_date, 0, n) for n, i in enumerate(ipo_items) if i.expected_date]
+            + [(e.report_date, 1, n) for n, e in enumerate(earnings_table.items) if e.report_date],
+        )
+        self.events: List[Item] = []
+        self.days: List[date] = []
+        self.market_cap: List[Optional[float]] = []
+        self.by_symbol: Dict[str, List[int]] = defaultdict(list)
+        self.by_category: Dict[str, List[int]] = {category: [] for category in CATEGORIES}
+        for position, (day, kind, n) in enumerate(merged):
+            item: Item = ipo_items[n] if kind == 0 else earnings_table.items[n]
+            self.events.append(item)
+            self.days.append(day)
+            self.market_cap.append(None if kind == 0 else earnings_table.market_cap[n])
+            self.by_category[CATEGORIES[kind]].append(position)
+            if item.symbol:
+                self.by_symbol[item.symbol.upper()].append(position)
+        self._blocks: List[Optional[str]] = [None] * len(self.events)
+
+    @classmethod
+    def load(cls, data_dir: Path = DATA_DIR) -> "EventStore":
+        index = EventIndex()
+        earnings = EarningsTable()
+        for payload in _stored_payloads("ipo", data_dir).values():
+            for item in normalize_from_json(payload):
+                index.upsert("ipo", item)
+        for payload in _stored_payloads("earnings", data_dir).values():
+            table = earnings_table_from_json(payload)
+            earnings.extend(table)
+            for item in table.items:
+                index.upsert("earnings", item)
+        store = cls(index.items("ipo"), earnings.align(index.items("earnings")))  # type: ignore[arg-type]
+        logging.info(
+            "Loaded %d IPO and %d earnings events from %s",
+            len(store.by_category["ipo"]), len(store.by_category["earnings"]), data_dir,
+        )
+        return store
+
+    def block(self, position: int) -> str:
+        entry = self._blocks[position]
+        if entry is None:
+            entry = self._blocks[position] = apply_stamp(render_combined_block(self.events[position]), self.loaded_at)
+        return entry
+
+
+@dataclass(frozen=True)
+class Query:
+    """Parsed, canonical filter set; two URLs asking for the same events compare equal."""
+
+    symbols: Tuple[str, ...] = ()
+    categories: Tuple[str, ...] = CATEGORIES
+    start: Optional[date] = None
+    end: Optional[date] = None
+    times: Tuple[str, ...] = ()
+    exchanges: Tuple[str, ...] = ()
+    statuses: Tuple[str, ...] = ()
+    min_market_cap: Optional[float] = None
+
+    @classmethod
+    def parse(cls, query_string: str) -> "Query":
+        params = parse_qs(query_string, keep_blank_values=False)
+
+        def values(*names: str) -> Tuple[str, ...]:
+            out = {v.strip() for name in names for raw in params.get(name, []) for v in raw.split(",")}
+            return tuple(sorted(v for v in out if v))
+
+        def choices(name: str, allowed: Tuple[str, ...]) -> Tuple[str, ...]:
+            chosen = tuple(v.lower() for v in values(name))
+            unknown = [v for v in chosen if v not in allowed]
+            if unknown:
+                raise QueryError(f"{name} must be one of {', '.join(allowed)}")
+            return tuple(sorted(set(chosen)))
+
+        def day(name: str) -> Optional[date]:
+            raw = params.get(name)
+            if not raw:
+                return None
+            try:
+                return date.fromisoformat(raw[-1].strip())
+            except ValueError:
+                raise QueryError(f"{name} must be a YYYY-MM-DD date") from None
+
+        min_cap: Optional[float] = None
+        if params.get("min_market_cap"):
+            try:
+                min_cap = float(params["min_market_cap"][-1])
+            except ValueError:
+                raise QueryError("min_market_cap must be a number") from None
+
+        query = cls(
+            symbols=tuple(sorted({s.upper() for s in values("symbols", "symbol")})),
+            categories=choices("category", CATEGORIES + ("all",)),
+            start=day("from"),
+            end=day("to"),
+            times=choices("time", TIMES),
+            exchanges=tuple(sorted({e.upper() for e in values("exchange")})),
+            statuses=choices("status", STATUSES),
+            min_market_cap=min_cap,
+        )
+        # Filters that only apply to one category imply it
+        categories = set(query.categories) - {"all"} or set(CATEGORIES)
+        if query.times or query.min_market_cap is not None:
+            categories &= {"earnings"}
+        if query.exchanges or query.statuses:
+            categories &= {"ipo"}
+        if not categories:
+            raise QueryError(
+                "time and min_market_cap only apply to earnings, exchange and status only to IPOs;"
+                " they cannot be combined with each other or with the other category"
+            )
+        return replace(query, categories=tuple(sorted(categories)))
+
+    def key(self) -> str:
+        """Canonical form of the query, used as the response cache key."""
+        pairs = [
+            ("symbols", ",".join(self.symbols)),
+            ("category", ",".join(self.categories)),
+            ("from", self.start.isoformat() if self.start else ""),
+            ("to", self.end.isoformat() if self.end else ""),
+            ("time", ",".join(self.times)),
+            ("exchange", ",".join(self.exchanges)),
+            ("status", ",".join(self.statuses)),
+            ("min_market_cap", repr(self.min_market_cap) if self.min_market_cap is not None else ""),
+        ]
+        return urlencode([(k, v) for k, v in pairs if v])
+
+    def select(self, store: EventStore) -> List[int]:
+        """Positions of the matching events, in feed order."""
+        lo = bisect_left(store.days, self.start) if self.start else 0
+        hi = bisect_right(store.days, self.end) if self.end else len(store.days)
+        if self.symbols:
+            candidates = sorted(p for s in self.symbols for p in store.by_symbol.get(s, ()))
+        elif len(self.categories) == 1:
+            candidates = store.by_category[self.categories[0]]
+        else:
+            candidates = range(len(store.events))  # type: ignore[assignment]
+        # Date bounds are applied by slicing the (sorted) candidate positions
+        candidates = candidates[bisect_left(candidates, lo):bisect_left(candidates, hi)]
+        return [p for p in candidates if self._matches(store, p)]
+
+    def _matches(self, store: EventStore, position: int) -> bool:
+        item = store.events[position]
+        if isinstance(item, IpoItem):
+            if "ipo" not in self.categories:
+                return False
+            if self.statuses and item.status.lower() not in self.statuses:
+                return False
+            if self.exchanges:
+                exchange = (item.exchange or "").upper()
+                return any(exchange.startswith(e) for e in self.exchanges)
+            return True
+        if "earnings" not in self.categories:
+            return False
+        if self.times and _TIME_CLASSES.get((item.time_of_day or "").upper(), "tbd") not in self.times:
+            return False
+        if self.min_market_cap is not None:
+            cap = store.market_cap[position]
+            return cap is not None and cap >= self.min_market_cap
+        return True
+
+
+def _accepts_gzip(accept_encoding: str) -> bool:
+    """Whether an ``Accept-Encoding`` header allows gzip (``gzip;q=0`` refuses it)."""
+    weights: Dict[str, float] = {}
+    for part in accept_encoding.split(","):
+        coding, _, params = part.partition(";")
+        coding = coding.strip().lower()
+        if not coding:
+            continue
+        q = 1.0
+        for param in params.split(";"):
+            name, _, value = param.partition("=")
+            if name.strip().lower() == "q":
+                try:
+                    q = float(value)
+                except ValueError:
+                    q = 0.0
+        weights[coding] = q
+    for coding in ("gzip", "x-gzip", "*"):
+        if coding in weights:
+            return weights[coding] > 0
+    return False
+
+
+def _etag_matches(if_none_match: str, etag: str) -> bool:
+    """``If-None-Match`` check: ``*`` matches, and tags compare weakly (``W/`` ignored)."""
+    if if_none_match.strip() == "*":
+        return True
+    bare = etag[2:] if etag.startswith("W/") else etag
+    for tag in if_none_match.split(","):
+        tag = tag.strip()
+        if (tag[2:] if tag.startswith("W/") else tag) == bare:
+            return True
+    return False
+
+
+@dataclass
+class Rendered:
+    body: bytes
+    etag: str
+    events: int
+    _gzipped: Optional[bytes] = field(default=None, init=False, repr=False)
+
+    @property
+    def size(self) -> int:
+        """Bytes held for this response, counting the gzip copy once built."""
+        return len(self.body) + len(self._gzipped or b"")
+
+    def gzipped(self) -> bytes:
+        if self._gzipped is None:
+            self._gzipped = gzip.compress(self.body, compresslevel=6, mtime=0)
+        return self._gzipped
+
+
+class QueryServer:
+    """Answers ``GET /calendar.ics?...`` from an :class:`EventStore`.
+
+    Rendered responses are kept in an LRU of at most ``cache_bytes`` bytes
+    keyed by :meth:`Query.key`, so differently ordered or cased URLs for the
+    same events share one entry. A response larger than the whole budget is
+    served but not kept.
+    """
+
+    def __init__(self, store: EventStore, cache_bytes: int = DEFAULT_CACHE_MB << 20) -> None:
+        self.store = store
+        self.cache_bytes = max(cache_bytes, 0)
+        self._cache: "OrderedDict[str, Rendered]" = OrderedDict()
+        self._cached_bytes = 0
+        self.hits = 0
+        self.misses = 0
+        self.not_modified = 0
+
+    def render(self, query: Query) -> Rendered:
+        key = query.key()
+        cached = self._cache.get(key)
+        if cached is not None:
+            self._cache.move_to_end(key)
+            self.hits += 1
+            return cached
+        self.misses += 1
+        positions = query.select(self.store)
+        title = "Nasdaq IPOs & Earnings"
+        if query.symbols:
+            title += ": " + ", ".join(query.symbols)
+        elif key:
+            title += " (filtered)"
+        text = "".join([
+            CRLF.join(calendar_header("nasdaq-query", ical_escape(title))) + CRLF,
+            *(self.store.block(p) for p in positions),
+            "END:VCALENDAR" + CRLF,
+        ])
+        body = text.encode("utf-8")
+        rendered = Rendered(body, f'"{hashlib.blake2b(body, digest_size=16).hexdigest()}"', len(positions))
+        self._cache[key] = rendered
+        self._resize(key, rendered.size)
+        return rendered
+
+    def _resize(self, key: str, added: int) -> None:
+        """Account ``added`` bytes to the entry at ``key`` and evict least recently used entries."""
+        if self._cache.get(key) is None:
+            return
+        self._cached_bytes += added
+        while self._cache and self._cached_bytes > self.cache_bytes:
+            _, evicted = self._cache.popitem(last=False)
+            self._cached_bytes -= evicted.size
+
+    def respond(self, method: str, target: str, headers: Mapping[str, str]) -> Tuple[int, Dict[str, str], bytes]:
+        """(status, headers, body) for one request; ``headers`` keys are lowercase."""
+        if method not in ("GET", "HEAD"):
+            return 405, {"Allow": "GET, HEAD"}, b""
+        parts = urlsplit(target)
+        if parts.path != FEED_PATH:
+            return 404, {"Content-Type": "text/plain; charset=utf-8"}, b"not found\n"
+        try:
+            query = Query.parse(parts.query)
+        except QueryError as exc:
+            return 400, {"Content-Type": "text/plain; charset=utf-8"}, f"{exc}\n".encode("utf-8")
+        rendered = self.render(query)
+        # Each encoding is a different representation and gets its own validator
+        use_gzip = _accepts_gzip(headers.get("accept-encoding", ""))
+        etag = rendered.etag[:-1] + '-gz"' if use_gzip else rendered.etag
+        out = {"ETag": etag, "Cache-Control": "public, max-age=300", "Vary": "Accept-Encoding"}
+        if _etag_matches(headers.get("if-none-match", ""), etag):
+            self.not_modified += 1
+            return 304, out, b""
+        body = rendered.body
+        if use_gzip:
+            before = rendered.size
+            body = rendered.gzipped()
+            self._resize(query.key(), rendered.size - before)
+            out["Content-Encoding"] = "gzip"
+        out["Content-Type"] = "text/calendar; charset=utf-8"
+        out["X-Fical-Events"] = str(rendered.events)
+        return 200, out, body
+
+    async def handle(self, reader: asyncio.StreamReader, writer: asyncio.StreamWriter) -> None:
+        """Serve HTTP/1.1 requests on one connection until it closes or idles out."""
+        try:
+            while True:
+                try:
+                    head = await asyncio.wait_for(reader.readuntil(b"\r\n\r\n"), KEEPALIVE_TIMEOUT)
+                except (asyncio.IncompleteReadError, asyncio.TimeoutError, asyncio.LimitOverrunError):
+                    break
+                lines = head.decode("latin-1").split("\r\n")
+                try:
+                    method, target, version = lines[0].split(" ", 2)
+                except ValueError:
+                    break
+                headers = {}
+                for line in lines[1:]:
+                    name, sep, value = line.partition(":")
+                    if sep:
+                        headers[name.strip().lower()] = value.strip()
+                status, out, body = self.respond(method, target, headers)
+                close = headers.get("connection", "").lower() == "close" or version == "HTTP/1.0"
+                out["Content-Length"] = str(len(body))
+                if close:
+                    out["Connection"] = "close"
+                response = [f"HTTP/1.1 {status} {_REASONS.get(status, '')}"]
+                response += [f"{name}: {value}" for name, value in out.items()]
+                writer.write(("\r\n".join(response) + "\r\n\r\n").encode("latin-1"))
+                if method != "HEAD" and status != 304:
+                    writer.write(body)
+                await writer.drain()
+                logging.debug("query %s %s -> %d (%d bytes)", method, target, status, len(body))
+                if close:
+                    break
+        except ConnectionError:
+            pass
+        finally:
+            writer.close()
+
+    async def serve(self, host: str, port: int) -> None:
+        server = await asyncio.start_server(self.handle, host, port, limit=MAX_HEADER_BYTES)
+        logging.info("Serving filtered feeds on http://%s:%d%s", host, port, FEED_PATH)
+        async with server:
+            await server.serve_forever()
+
+
+def main(argv: Optional[list] = None) -> int:
+    configure_logging()
+    parser = argparse.ArgumentParser(prog="python -m src.query_server", description=__doc__.splitlines()[0])
+    parser.add_argument("--host", default="127.0.0.1")
+    parser.add_argument("--port", type=int, default=8766)
+    parser.add_argument("--data-dir", type=Path, default=DATA_DIR, help="directory holding snapshots/ or the legacy *.json")
+    parser.add_argument(
+        "--cache-mb", type=int, default=env_int("FICAL_QUERY_CACHE_MB", DEFAULT_CACHE_MB),
+        help=f"megabytes of rendered responses kept in the LRU cache (default {DEFAULT_CACHE_MB})",
+    )
+    args = parser.parse_args(argv)
+
+    server = QueryServer(EventStore.load(args.data_dir), args.cache_mb << 20)
+    try:
+        asyncio.run(server.serve(args.host, args.port))
+    except KeyboardInterrupt:
+        pass
+    finally:
+        logging.info(
+            "Response cache: %d hits, %d rendered, %d not modified",
+            server.hits, server.misses, server.not_modified,
+        )
+    return 0
+
+
+if __name__ == "__main__":
+    raise SystemExit(main())
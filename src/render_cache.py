@@ -0,0 +1,80 @@
+from __future__ import annotations
+
+import hashlib
+import json
+import logging
+from datetime import date
+from pathlib import Path
+from typing import Callable, Dict, Optional, Tuple
+
+from .utils import atomic_write_bytes
+
+# Bump whenever VEVENT rendering changes so stale blocks are not reused.
+RENDER_VERSION = 2
+
+
+class RenderCache:
+    """Rendered VEVENT blocks persisted between runs.
+
+    Entries are keyed by a hash of the item's field values plus the feed
+    variant (UID style and summary prefix). Each entry remembers the event date
+    so that :meth:`save` can evict anything that has fallen out of the horizon.
+    """
+
+    def __init__(self, path: Path) -> None:
+        self.path = Path(path)
+        self._entries: Dict[str, Tuple[str, str]] = {}
+        self._used: set = set()
+        self.hits = 0
+        self.misses = 0
+
+    @staticmethod
+    def key_for(item: object, variant: str) -> str:
+        # Frozen dataclass reprs list every field in declaration order.
+        raw = f"{RENDER_VERSION}|{variant}|{item!r}".encode("utf-8")
+        return hashlib.blake2b(raw, digest_size=16).hexdigest()
+
+    def load(self) -> "RenderCache":
+        try:
+            with self.path.open("r", encoding="utf-8") as f:
+                payload = json.load(f)
+        except (OSError, ValueError):
+            return self
+        if not isinstance(payload, dict) or payload.get("version") != RENDER_VERSION:
+            return self
+        entries = payload.get("entries")
+        if isinstance(entries, dict):
+            self._entries = {k: (v[0], v[1]) for k, v in entries.items() if isinstance(v, list) and len(v) == 2}
+        return self
+
+    def get_or_render(self, item: object, variant: str, day: date, render: Callable[[], str]) -> str:
+        key = self.key_for(item, variant)
+        self._used.add(key)
+        entry = self._entries.get(key)
+        if entry is not None:
+            self.hits += 1
+            return entry[1]
+        self.misses += 1
+        block = render()
+        self._entries[key] = (day.isoformat(), block)
+        return block
+
+    def save(self, horizon_start: Optional[date] = None) -> None:
+        """Persist entries used this run plus unused ones still inside the horizon."""
+        cutoff = horizon_start.isoformat() if horizon_start else ""
+        kept = {
+            k: list(v)
+            for k, v in self._entries.items()
+            if k in self._used or v[0] >= cutoff
+        }
+        evicted = len(self._entries) - len(kept)
+        atomic_write_bytes(
+            self.path,
+            json.dumps(
+                {"version": RENDER_VERSION, "entries": kept}, ensure_ascii=False, separators=(",", ":")
+            ).encode("utf-8"),
+        )
+        logging.info(
+            "Render cache: %d hits, %d rendered, %d kept, %d evicted",
+            self.hits, self.misses, len(kept), evicted,
+        )
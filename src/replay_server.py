@@ -0,0 +1,202 @@
+"""Local stand-in for the Nasdaq endpoints, serving archived payloads.
+
+Run ``python -m src.replay_server --port 8765`` and point the build at it::
+
+    FICAL_NASDAQ_API_BASE=http://127.0.0.1:8765 \\
+    FICAL_NASDAQ_WEB_BASE=http://127.0.0.1:8765 python -m src.main
+
+Routes mirror the real ones: ``/api/ipo/calendar?date=YYYY-MM``,
+``/api/calendar/earnings?date=YYYY-MM`` or ``YYYY-MM-DD`` and
+``/market-activity/ipos``. Latency, 429/5xx rates and rejection of the
+monthly earnings endpoint can be injected; faults are drawn from a seeded
+RNG so runs are reproducible.
+"""
+from __future__ import annotations
+
+import argparse
+import html
+import json
+import logging
+import random
+import re
+import threading
+import time
+from dataclasses import dataclass
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+from pathlib import Path
+from typing import Any, Dict, Mapping, Optional, Tuple
+from urllib.parse import parse_qs, urlsplit
+
+from .archive import Archive
+from .snapshot_store import SnapshotStore
+from .utils import configure_logging
+
+ROOT_DIR = Path(__file__).resolve().parent.parent
+DATA_DIR = ROOT_DIR / "data"
+_MONTH_RE = re.compile(r"^\d{4}-\d{2}$")
+_DAY_RE = re.compile(r"^\d{4}-\d{2}-\d{2}$")
+# Columns of the HTML fallback table, in the names parse_html_fallback lowercases.
+_HTML_COLUMNS = (
+    ("Company Name", "companyName"),
+    ("Symbol", "proposedTickerSymbol"),
+    ("Exchange", "proposedExchange"),
+    ("Price", "proposedSharePrice"),
+    ("Expected Date", "expectedPriceDate"),
+)
+# What Nasdaq answers when the monthly earnings endpoint refuses a date-only query.
+_REJECTED = {"data": None, "message": None, "status": {"rCode": 400, "bCodeMessage": [{"code": 1001, "errorMessage": "Invalid date"}]}}
+
+
+@dataclass(frozen=True)
+class Faults:
+    """Injected misbehaviour. Rates are probabilities per request."""
+
+    latency: float = 0.0
+    jitter: float = 0.0
+    rate_429: float = 0.0
+    rate_5xx: float = 0.0
+    reject_months: bool = False
+    seed: int = 0
+
+
+def load_payloads(kind: str, run_date: Optional[str] = None) -> Mapping[str, Any]:
+    """Payloads of one kind: an archived run, the snapshot store, or the legacy blob."""
+    if run_date:
+        return Archive(DATA_DIR / "archive" / kind).rebuild(run_date)
+    store = SnapshotStore(DATA_DIR / "snapshots" / kind)
+    if store.exists():
+        return store
+    try:
+        with (DATA_DIR / f"{kind}.json").open("r", encoding="utf-8") as f:
+            return json.load(f)
+    except (OSError, ValueError):
+        return {}
+
+
+def render_ipo_table(payloads: Mapping[str, Any]) -> str:
+    """The upcoming IPOs of every month as the plain HTML table the fallback parser reads."""
+    head = "".join(f"<th>{title}</th>" for title, _ in _HTML_COLUMNS)
+    body = []
+    for key in sorted(payloads):
+        data = (payloads[key] or {}).get("data") or {}
+        rows = ((data.get("upcoming") or {}).get("upcomingTable") or {}).get("rows") or []
+        for row in rows:
+            cells = "".join(f"<td>{html.escape(str(row.get(field) or ''))}</td>" for _, field in _HTML_COLUMNS)
+            body.append(f"<tr>{cells}</tr>")
+    return f"<html><body><table><tr>{head}</tr>{''.join(body)}</table></body></html>"
+
+
+class ReplayServer(ThreadingHTTPServer):
+    """Threaded HTTP server answering Nasdaq routes from recorded payloads."""
+
+    daemon_threads = True
+
+    def __init__(
+        self,
+        address: Tuple[str, int],
+        ipo: Mapping[str, Any],
+        earnings: Mapping[str, Any],
+        faults: Faults = Faults(),
+    ) -> None:
+        super().__init__(address, _Handler)
+        self.ipo = ipo
+        self.earnings = earnings
+        self.faults = faults
+        self._rng = random.Random(faults.seed)
+        self._lock = threading.Lock()
+        self.served: Dict[int, int] = {}
+
+    @property
+    def base_url(self) -> str:
+        host, port = self.server_address[:2]
+        return f"http://{host}:{port}"
+
+    def draw(self) -> Tuple[float, Optional[int]]:
+        """Delay and injected error status (or None) for the next request."""
+        f = self.faults
+        with self._lock:
+            delay = f.latency + (self._rng.uniform(-f.jitter, f.jitter) if f.jitter else 0.0)
+            roll = self._rng.random()
+        if roll < f.rate_429:
+            return max(delay, 0.0), 429
+        if roll < f.rate_429 + f.rate_5xx:
+            return max(delay, 0.0), 503
+        return max(delay, 0.0), None
+
+    def count(self, status: int) -> None:
+        with self._lock:
+            self.served[status] = self.served.get(status, 0) + 1
+
+    def route(self, path: str, query: Dict[str, str]) -> Tuple[int, str, bytes]:
+        """(status, content type, body) for one request."""
+        value = query.get("date", "")
+        if path == "/api/ipo/calendar" and _MONTH_RE.match(value):
+            payload = self.ipo.get(value) or {"data": None}
+            return 200, "application/json", json.dumps(payload).encode("utf-8")
+        if path == "/api/calendar/earnings" and _MONTH_RE.match(value):
+            payload = None if self.faults.reject_months else self.earnings.get(value)
+            return 200, "application/json", json.dumps(payload or _REJECTED).encode("utf-8")
+        if path == "/api/calendar/earnings" and _DAY_RE.match(value):
+            payload = self.earnings.get(value) or {"data": {"asOf": None, "headers": {}, "rows": []}}
+            return 200, "application/json", json.dumps(payload).encode("utf-8")
+        if path == "/market-activity/ipos":
+            return 200, "text/html; charset=utf-8", render_ipo_table(self.ipo).encode("utf-8")
+        return 404, "application/json", b'{"data":null}'
+
+
+class _Handler(BaseHTTPRequestHandler):
+    server: ReplayServer
+    protocol_version = "HTTP/1.1"
+
+    def do_GET(self) -> None:  # noqa: N802 - http.server naming
+        parts = urlsplit(self.path)
+        query = {k: v[0] for k, v in parse_qs(parts.query).items()}
+        delay, injected = self.server.draw()
+        if delay:
+            time.sleep(delay)
+        if injected is not None:
+            status, content_type, body = injected, "application/json", b'{"data":null}'
+        else:
+            status, content_type, body = self.server.route(parts.path, query)
+        self.server.count(status)
+        self.send_response(status)
+        self.send_header("Content-Type", content_type)
+        self.send_header("Content-Length", str(len(body)))
+        self.end_headers()
+        self.wfile.write(body)
+
+    def log_message(self, format: str, *args: Any) -> None:
+        logging.debug("replay: " + format, *args)
+
+
+def main(argv: Optional[list] = None) -> int:
+    configure_logging()
+    parser = argparse.ArgumentParser(prog="python -m src.replay_server", description=__doc__.splitlines()[0])
+    parser.add_argument("--host", default="127.0.0.1")
+    parser.add_argument("--port", type=int, default=8765)
+    parser.add_argument("--date", help="serve the archived run of this date (YYYY-MM-DD) instead of the latest snapshots")
+    parser.add_argument("--latency", type=float, default=0.0, help="seconds added to every response")
+    parser.add_argument("--jitter", type=float, default=0.0, help="+/- seconds of uniform jitter on the latency")
+    parser.add_argument("--rate-429", type=float, default=0.0, help="fraction of requests answered with 429")
+    parser.add_argument("--rate-5xx", type=float, default=0.0, help="fraction of requests answered with 503")
+    parser.add_argument("--reject-months", action="store_true", help="reject monthly earnings queries")
+    parser.add_argument("--seed", type=int, default=0)
+    args = parser.parse_args(argv)
+
+    faults = Faults(args.latency, args.jitter, args.rate_429, args.rate_5xx, args.reject_months, args.seed)
+    server = ReplayServer(
+        (args.host, args.port), load_payloads("ipo", args.date), load_payloads("earnings", args.date), faults,
+    )
+    logging.info("Replaying Nasdaq payloads on %s (%s)", server.base_url, faults)
+    try:
+        server.serve_forever()
+    except KeyboardInterrupt:
+        pass
+    finally:
+        server.server_close()
+        logging.info("Responses served by status: %s", server.served)
+    return 0
+
+
+if __name__ == "__main__":
+    raise SystemExit(main())
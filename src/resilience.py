@@ -0,0 +1,221 @@
+from __future__ import annotations
+
+import logging
+import threading
+import time
+from dataclasses import dataclass
+from typing import Optional
+
+import requests
+from requests.adapters import HTTPAdapter
+from urllib3.util.retry import Retry
+
+# Statuses that mean "upstream is unhealthy or throttling us" rather than
+# "this particular query is invalid" (e.g. the monthly earnings 400).
+RETRY_STATUSES = (429, 500, 502, 503, 504)
+FAILURE_STATUSES = frozenset({403, *RETRY_STATUSES})
+
+
+class CircuitOpenError(requests.exceptions.ConnectionError):
+    """Raised instead of sending a request once the breaker or deadline trips."""
+
+
+@dataclass(frozen=True)
+class SessionPolicy:
+    pool_size: int = 8
+    max_retries: int = 3
+    backoff_factor: float = 0.5
+    backoff_jitter: float = 0.5
+    requests_per_second: float = 5.0
+    burst: int = 5
+    failure_threshold: int = 10
+    breaker_cooldown: float = 60.0
+    run_deadline: Optional[float] = 600.0
+
+
+class TokenBucket:
+    """Thread-safe token bucket; ``acquire`` blocks until a token is free."""
+
+    def __init__(self, rate: float, capacity: int) -> None:
+        self.rate = rate
+        self.capacity = max(capacity, 1)
+        self._tokens = float(self.capacity)
+        self._updated = time.monotonic()
+        self._lock = threading.Lock()
+
+    def acquire(self) -> None:
+        if self.rate <= 0:
+            return
+        while True:
+            with self._lock:
+                now = time.monotonic()
+                self._tokens = min(self.capacity, self._tokens + (now - self._updated) * self.rate)
+                self._updated = now
+                if self._tokens >= 1:
+                    self._tokens -= 1
+                    return
+                wait = (1 - self._tokens) / self.rate
+            time.sleep(wait)
+
+
+class CircuitBreaker:
+    """Opens after ``threshold`` consecutive failures.
+
+    While open, requests are refused until ``cooldown`` seconds have passed;
+    then a single trial request is let through and its outcome decides whether
+    the breaker closes again.
+    """
+
+    def __init__(self, threshold: int, cooldown: float) -> None:
+        self.threshold = threshold
+        self.cooldown = cooldown
+        self.consecutive_failures = 0
+        self.opened_at: Optional[float] = None
+        self.trips = 0
+        self._trial_in_flight = False
+        self._lock = threading.Lock()
+
+    @property
+    def is_open(self) -> bool:
+        return self.opened_at is not None
+
+    def allow(self) -> bool:
+        with self._lock:
+            if self.opened_at is None:
+                return True
+            if self._trial_in_flight or time.monotonic() - self.opened_at < self.cooldown:
+                return False
+            self._trial_in_flight = True
+            return True
+
+    def record_success(self) -> None:
+        with self._lock:
+            self.consecutive_failures = 0
+            self.opened_at = None
+            self._trial_in_flight = False
+
+    def record_failure(self) -> None:
+        with self._lock:
+            self.consecutive_failures += 1
+            self._trial_in_flight = False
+            if self.threshold > 0 and self.consecutive_failures >= self.threshold:
+                if self.opened_at is None:
+                    self.trips += 1
+                    logging.warning(
+                        "Circuit breaker open after %d consecutive failures",
+                        self.consecutive_failures,
+                    )
+                self.opened_at = time.monotonic()
+
+
+class DeadlineRetry(Retry):
+    """``Retry`` that stays inside the adapter's run deadline and breaker.
+
+    urllib3 sleeps between attempts inside a single ``send``, so the backoff
+    and ``Retry-After`` waits are clamped to the time left before the
+    deadline. Every failure that leads to another attempt is recorded with
+    the breaker, and retrying stops (raising :class:`CircuitOpenError`) once
+    the deadline has passed or the breaker has opened.
+    """
+
+    adapter: Optional["ResilientAdapter"] = None
+
+    def new(self, **kw):  # type: ignore[no-untyped-def]
+        retry = super().new(**kw)
+        retry.adapter = self.adapter
+        return retry
+
+    def _clamp(self, seconds: float) -> float:
+        remaining = self.adapter.remaining() if self.adapter is not None else None
+        return seconds if remaining is None else max(min(seconds, remaining), 0.0)
+
+    def get_backoff_time(self) -> float:
+        return self._clamp(super().get_backoff_time())
+
+    def parse_retry_after(self, retry_after: str) -> float:
+        return self._clamp(super().parse_retry_after(retry_after))
+
+    def increment(self, method=None, url=None, *args, **kwargs):  # type: ignore[no-untyped-def]
+        # Raises MaxRetryError (or returns the last response) once retries are exhausted;
+        # that final outcome is recorded by ResilientAdapter.send.
+        retry = super().increment(method, url, *args, **kwargs)
+        if self.adapter is not None:
+            self.adapter.breaker.record_failure()
+            self.adapter.stop_if_tripped(url)
+        return retry
+
+    def sleep(self, response=None):  # type: ignore[no-untyped-def]
+        super().sleep(response)
+        if self.adapter is not None:
+            self.adapter.stop_if_tripped()
+
+
+class ResilientAdapter(HTTPAdapter):
+    """HTTPAdapter adding a shared rate limit, circuit breaker and run deadline.
+
+    Retries with jittered exponential backoff are delegated to urllib3 and do
+    not consume extra tokens. Each retried failure counts toward the breaker,
+    as does the final outcome of the request; see :class:`DeadlineRetry`.
+    """
+
+    def __init__(self, policy: SessionPolicy) -> None:
+        retry = DeadlineRetry(
+            total=policy.max_retries,
+            connect=policy.max_retries,
+            read=policy.max_retries,
+            status=policy.max_retries,
+            status_forcelist=RETRY_STATUSES,
+            allowed_methods=frozenset({"GET", "HEAD"}),
+            backoff_factor=policy.backoff_factor,
+            backoff_jitter=policy.backoff_jitter,
+            respect_retry_after_header=True,
+            raise_on_status=False,
+        )
+        super().__init__(
+            pool_connections=policy.pool_size,
+            pool_maxsize=policy.pool_size,
+            max_retries=retry,
+        )
+        self.limiter = TokenBucket(policy.requests_per_second, policy.burst)
+        self.breaker = CircuitBreaker(policy.failure_threshold, policy.breaker_cooldown)
+        self.deadline = (
+            time.monotonic() + policy.run_deadline if policy.run_deadline else None
+        )
+        retry.adapter = self
+
+    def remaining(self) -> Optional[float]:
+        if self.deadline is None:
+            return None
+        return self.deadline - time.monotonic()
+
+    def stop_if_tripped(self, url: Optional[str] = None) -> None:
+        """Raise instead of retrying once the run deadline has passed or the breaker opened."""
+        remaining = self.remaining()
+        if remaining is not None and remaining <= 0:
+            raise CircuitOpenError(f"run deadline exceeded; not retrying {url or 'request'}")
+        if self.breaker.is_open:
+            raise CircuitOpenError(f"circuit open; not retrying {url or 'request'}")
+
+    def send(self, request, timeout=None, **kwargs):  # type: ignore[override]
+        remaining = self.remaining()
+        if remaining is not None and remaining <= 0:
+            raise CircuitOpenError(f"run deadline exceeded; skipping {request.url}")
+        if not self.breaker.allow():
+            raise CircuitOpenError(f"circuit open; skipping {request.url}")
+        self.limiter.acquire()
+        if remaining is not None and isinstance(timeout, (int, float)):
+            timeout = max(min(timeout, remaining), 0.1)
+        try:
+            response = super().send(request, timeout=timeout, **kwargs)
+        except Exception as exc:
+            # A retry stopped by DeadlineRetry has already recorded its failure
+            # (requests wraps it in a ConnectionError).
+            cause = exc.args[0] if exc.args else None
+            if not isinstance(exc, CircuitOpenError) and not isinstance(cause, CircuitOpenError):
+                self.breaker.record_failure()
+            raise
+        if response.status_code in FAILURE_STATUSES:
+            self.breaker.record_failure()
+        else:
+            self.breaker.record_success()
+        return response
@@ -0,0 +1,134 @@
+from __future__ import annotations
+
+import gzip
+import hashlib
+import json
+import logging
+from collections.abc import Mapping
+from pathlib import Path
+from typing import Any, Dict, Iterable, Iterator, List, Optional
+
+from .utils import atomic_write_bytes
+
+MANIFEST_NAME = "manifest.json"
+
+
+def canonical_json(obj: object) -> bytes:
+    """Compact, key-sorted UTF-8 JSON; identical payloads give identical bytes."""
+    return json.dumps(obj, ensure_ascii=False, sort_keys=True, separators=(",", ":")).encode("utf-8")
+
+
+class SnapshotStore(Mapping):
+    """Raw API payloads stored as one compact file per shard key.
+
+    A shard key is a month (``2025-11``) or day (``2025-11-03``), matching the
+    keys of the old single-file snapshots. ``manifest.json`` records each
+    shard's content hash and file name, plus the keys written by the latest
+    run. Shards are only rewritten when their hash changes. Reads go through
+    the Mapping interface, and ``store[key]`` parses just that one shard.
+    """
+
+    def __init__(self, directory: Path, compress: bool = False) -> None:
+        self.directory = Path(directory)
+        self.compress = compress
+        self.manifest: Dict[str, Any] = {"shards": {}, "latest": []}
+        self._rewritten: List[str] = []
+        self._load_manifest()
+
+    @property
+    def manifest_path(self) -> Path:
+        return self.directory / MANIFEST_NAME
+
+    def exists(self) -> bool:
+        return self.manifest_path.exists()
+
+    def _load_manifest(self) -> None:
+        try:
+            with self.manifest_path.open("r", encoding="utf-8") as f:
+                manifest = json.load(f)
+        except (OSError, ValueError):
+            return
+        if isinstance(manifest, dict) and isinstance(manifest.get("shards"), dict):
+            manifest.setdefault("latest", [])
+            self.manifest = manifest
+
+    def _shard_name(self, key: str) -> str:
+        return f"{key}.json.gz" if self.compress else f"{key}.json"
+
+    # Mapping interface: lazy, one shard per lookup
+    def __getitem__(self, key: str) -> Any:
+        entry = self.manifest["shards"].get(key)
+        if entry is None:
+            raise KeyError(key)
+        raw = (self.directory / entry["file"]).read_bytes()
+        if entry["file"].endswith(".gz"):
+            raw = gzip.decompress(raw)
+        return json.loads(raw)
+
+    def __iter__(self) -> Iterator[str]:
+        return iter(sorted(self.manifest["shards"]))
+
+    def __len__(self) -> int:
+        return len(self.manifest["shards"])
+
+    def get(self, key: str, default: Any = None) -> Any:
+        try:
+            return self[key]
+        except (KeyError, OSError, ValueError):
+            return default
+
+    def shard_hash(self, key: str) -> Optional[str]:
+        entry = self.manifest["shards"].get(key)
+        return entry["sha256"] if entry else None
+
+    def latest_keys(self) -> List[str]:
+        """Shard keys of the most recent run that are still stored."""
+        return [key for key in self.manifest.get("latest", []) if key in self.manifest["shards"]]
+
+    def latest(self) -> Dict[str, Any]:
+        """Payloads written by the most recent run, keyed like the old blob."""
+        return {key: self[key] for key in self.latest_keys()}
+
+    def put(self, key: str, payload: Any) -> bytes:
+        """Spill one shard to disk now if its content changed; returns its canonical bytes.
+
+        The manifest is only rewritten by :meth:`commit`, so shards can be
+        stored one by one as they arrive without holding the whole run.
+        """
+        data = canonical_json(payload)
+        digest = hashlib.sha256(data).hexdigest()
+        name = self._shard_name(key)
+        entry = self.manifest["shards"].get(key)
+        if entry and entry["sha256"] == digest and entry["file"] == name:
+            return data
+        blob = gzip.compress(data, compresslevel=9, mtime=0) if self.compress else data
+        atomic_write_bytes(self.directory / name, blob)
+        if entry and entry["file"] != name:
+            try:
+                (self.directory / entry["file"]).unlink()
+            except OSError:
+                pass
+        self.manifest["shards"][key] = {"sha256": digest, "file": name, "bytes": len(data)}
+        self._rewritten.append(key)
+        return data
+
+    def commit(self, keys: Iterable[str]) -> List[str]:
+        """Record ``keys`` as this run's shards and write the manifest.
+
+        Returns the keys whose shard was rewritten since the last commit.
+        """
+        keys = sorted(keys)
+        changed, self._rewritten = self._rewritten, []
+        self.manifest["latest"] = keys
+        atomic_write_bytes(self.manifest_path, json.dumps(self.manifest, indent=1, sort_keys=True).encode("utf-8"))
+        logging.info(
+            "Snapshot store %s: %d of %d shards rewritten",
+            self.directory, len(changed), len(keys),
+        )
+        return changed
+
+    def write(self, snapshots: Dict[str, Any]) -> List[str]:
+        """Store this run's payloads; returns the keys whose shard was rewritten."""
+        for key in sorted(snapshots):
+            self.put(key, snapshots[key])
+        return self.commit(snapshots)
@@ -1,23 +1,178 @@
 from __future__ import annotations
 
+import logging
+from collections import Counter
 from datetime import date
-from typing import Any, Dict, List, Optional
-
-from dateutil import parser as dateparser
+from functools import lru_cache
+from itertools import repeat
+from typing import Any, Dict, FrozenSet, Iterable, List, Optional, Tuple
 
+from .earnings_table import EarningsTable, parse_numbers
 from .utils import IpoItem, EarningsItem
 
+_MONTH_ABBR = {
+    name: i
+    for i, name in enumerate(
+        ["jan", "feb", "mar", "apr", "may", "jun", "jul", "aug", "sep", "oct", "nov", "dec"],
+        start=1,
+    )
+}
 
-def parse_date_safe(value: Optional[str]) -> Optional[date]:
-    if not value:
+# How each distinct date string was resolved (memoized repeats are not counted
+# here; see date_parse_stats for cache hits).
+_DATE_PARSE_PATHS: Counter = Counter()
+
+
+def _parse_mdy(value: str) -> Optional[date]:
+    """``11/13/2025`` as used in IPO rows."""
+    parts = value.split("/")
+    if len(parts) != 3 or not all(p.isdigit() for p in parts) or len(parts[2]) != 4:
+        return None
+    return date(int(parts[2]), int(parts[0]), int(parts[1]))
+
+
+def _parse_asof(value: str) -> Optional[date]:
+    """``Sat, Nov 1, 2025`` as used in earnings ``asOf``."""
+    parts = value.replace(",", " ").split()
+    if len(parts) == 4:
+        parts = parts[1:]
+    if len(parts) != 3 or not parts[1].isdigit() or not parts[2].isdigit() or len(parts[2]) != 4:
+        return None
+    month = _MONTH_ABBR.get(parts[0][:3].lower())
+    if month is None:
         return None
+    return date(int(parts[2]), month, int(parts[1]))
+
+
+def _parse_iso(value: str) -> Optional[date]:
+    """``2025-11-13``."""
+    if len(value) != 10 or value[4] != "-" or value[7] != "-":
+        return None
+    return date.fromisoformat(value)
+
+
+_FAST_PATHS = (("mdy", _parse_mdy), ("asof", _parse_asof), ("iso", _parse_iso))
+
+
+@lru_cache(maxsize=4096)
+def _parse_date_memo(value: str) -> Optional[date]:
+    for name, parse in _FAST_PATHS:
+        try:
+            parsed = parse(value)
+        except ValueError:
+            parsed = None
+        if parsed is not None:
+            _DATE_PARSE_PATHS[name] += 1
+            return parsed
+    # dateutil only for formats the fast paths miss; importing it costs ~10ms
+    from dateutil import parser as dateparser
+
     try:
         dt = dateparser.parse(value)
-        if not dt:
-            return None
-        return dt.date()
     except Exception:
+        dt = None
+    _DATE_PARSE_PATHS["dateutil" if dt else "invalid"] += 1
+    return dt.date() if dt else None
+
+
+def parse_date_safe(value: Optional[str]) -> Optional[date]:
+    if not value:
         return None
+    return _parse_date_memo(value.strip())
+
+
+def date_parse_stats() -> Dict[str, int]:
+    """Counters for date parsing: memo hits/misses plus the path per miss."""
+    info = _parse_date_memo.cache_info()
+    stats = {"memo_hits": info.hits, "memo_misses": info.misses}
+    stats.update(_DATE_PARSE_PATHS)
+    return stats
+
+
+def _present(keys: FrozenSet[str], candidates: Tuple[str, ...]) -> Tuple[str, ...]:
+    return tuple(k for k in candidates if k in keys)
+
+
+def _schema_keys(table: Dict[str, Any], rows: List[Any]) -> FrozenSet[str]:
+    """Field names of a table: its ``headers`` block plus the keys of its first row."""
+    headers = table.get("headers")
+    keys = set(headers) if isinstance(headers, dict) else set()
+    first = next((r for r in rows if isinstance(r, dict)), None)
+    if first:
+        keys.update(first)
+    return frozenset(keys)
+
+
+def _warn_unknown_schema(kind: str, keys: FrozenSet[str], missing: List[str]) -> None:
+    """Log each unrecognized payload layout once per process."""
+    signature = (kind, keys)
+    if signature in _UNKNOWN_SCHEMAS:
+        return
+    _UNKNOWN_SCHEMAS.add(signature)
+    logging.warning(
+        "Unrecognized %s payload schema (fields: %s); no column for %s",
+        kind, ", ".join(sorted(keys)) or "none", ", ".join(missing),
+    )
+
+
+# IPO columns: (field, candidate keys). Values are kept when truthy, as str.
+_IPO_FIELDS = (
+    ("company", ("companyName",)),
+    ("symbol", ("proposedTickerSymbol",)),
+    ("exchange", ("proposedExchange",)),
+    ("price", ("proposedSharePrice",)),
+    ("deal", ("dollarValueOfSharesOffered", "sharesOffered")),
+)
+_UNKNOWN_SCHEMAS: set = set()
+
+
+@lru_cache(maxsize=64)
+def _compile_ipo_schema(keys: FrozenSet[str], date_key: str) -> Tuple[Tuple[str, ...], ...]:
+    """Per field, the candidate keys this payload layout actually has."""
+    compiled = tuple(_present(keys, candidates) for _, candidates in _IPO_FIELDS) + (_present(keys, (date_key,)),)
+    missing = [name for (name, _), found in zip(_IPO_FIELDS, compiled) if not found and name in ("company", "symbol")]
+    if keys and (missing or not compiled[-1]):
+        _warn_unknown_schema("IPO", keys, missing + ([] if compiled[-1] else [date_key]))
+    return compiled
+
+
+def _raw_column(rows: List[Dict[str, Any]], keys: Tuple[str, ...]) -> List[Any]:
+    """One field's values across ``rows``; with several keys the first truthy one wins."""
+    if not keys:
+        return [None] * len(rows)
+    if len(keys) == 1:
+        key = keys[0]
+        return [row.get(key) for row in rows]
+    values = [row.get(keys[0]) for row in rows]
+    for key in keys[1:]:
+        values = [v or row.get(key) for v, row in zip(values, rows)]
+    return values
+
+
+def _str_column(rows: List[Dict[str, Any]], keys: Tuple[str, ...]) -> List[Optional[str]]:
+    """``str(value) if value else None`` for one field across ``rows``."""
+    return [(v if type(v) is str else str(v)) if v else None for v in _raw_column(rows, keys)]
+
+
+def _ipo_records(table: Dict[str, Any], rows: List[Any], status: str, date_key: str) -> Iterable[Tuple[Any, ...]]:
+    """IpoItem field tuples for one table, extracted column by column.
+
+    The field mapping is compiled once per layout, so the per-row work is a
+    dict lookup and a truthiness test per field.
+    """
+    company_k, symbol_k, exchange_k, price_k, deal_k, day_k = _compile_ipo_schema(_schema_keys(table, rows), date_key)
+    rows = [row for row in rows if isinstance(row, dict)]
+    n = len(rows)
+    return zip(
+        [c or "Unknown Company" for c in _str_column(rows, company_k)],
+        _str_column(rows, symbol_k),
+        repeat(status, n),
+        [parse_date_safe(d) if d else None for d in _str_column(rows, day_k)],
+        _str_column(rows, exchange_k),
+        _str_column(rows, price_k),
+        _str_column(rows, deal_k),
+        repeat(None, n),
+    )
 
 
 def normalize_from_json(month_payload: Dict[str, Any]) -> List[IpoItem]:
@@ -26,7 +181,9 @@ def normalize_from_json(month_payload: Dict[str, Any]) -> List[IpoItem]:
     Handles current structure:
       data.upcoming.upcomingTable.rows[].expectedPriceDate
       data.priced.rows[].pricedDate
-    Ignores "filed" and "withdrawn" for event generation.
+    Ignores "filed" and "withdrawn" for event generation. Each table's field
+    mapping is compiled once from its ``headers`` (or first row) and then
+    applied to every row.
     """
     items: List[IpoItem] = []
     if not isinstance(month_payload, dict):
@@ -35,58 +192,30 @@ def normalize_from_json(month_payload: Dict[str, Any]) -> List[IpoItem]:
     if not isinstance(data, dict):
         return items
 
+    # Rows are collected as IpoItem field tuples and built in one batch
+    records: List[Tuple[Any, ...]] = []
+
     # Upcoming IPOs
     upcoming = data.get("upcoming")
     if isinstance(upcoming, dict):
+        table: Dict[str, Any] = upcoming
         rows: Optional[List[Dict[str, Any]]] = None
         if isinstance(upcoming.get("upcomingTable"), dict):
-            rows = upcoming["upcomingTable"].get("rows")  # type: ignore[index]
+            table = upcoming["upcomingTable"]
+            rows = table.get("rows")
         if rows is None and isinstance(upcoming.get("rows"), list):
+            table = upcoming
             rows = upcoming.get("rows")  # type: ignore[assignment]
 
         if isinstance(rows, list):
-            for row in rows:
-                if not isinstance(row, dict):
-                    continue
-                item = IpoItem(
-                    company_name=str(row.get("companyName") or "Unknown Company"),
-                    symbol=(str(row.get("proposedTickerSymbol")) if row.get("proposedTickerSymbol") else None),
-                    status="UPCOMING",
-                    expected_date=parse_date_safe(str(row.get("expectedPriceDate")) if row.get("expectedPriceDate") else None),
-                    exchange=(str(row.get("proposedExchange")) if row.get("proposedExchange") else None),
-                    price_range=(str(row.get("proposedSharePrice")) if row.get("proposedSharePrice") else None),
-                    deal_size=(
-                        str(row.get("dollarValueOfSharesOffered") or row.get("sharesOffered"))
-                        if (row.get("dollarValueOfSharesOffered") or row.get("sharesOffered"))
-                        else None
-                    ),
-                    link_url=None,
-                )
-                items.append(item)
+            records.extend(_ipo_records(table, rows, "UPCOMING", "expectedPriceDate"))
 
     # Priced IPOs
     priced = data.get("priced")
     if isinstance(priced, dict) and isinstance(priced.get("rows"), list):
-        for row in priced["rows"]:
-            if not isinstance(row, dict):
-                continue
-            item = IpoItem(
-                company_name=str(row.get("companyName") or "Unknown Company"),
-                symbol=(str(row.get("proposedTickerSymbol")) if row.get("proposedTickerSymbol") else None),
-                status="PRICED",
-                expected_date=parse_date_safe(str(row.get("pricedDate")) if row.get("pricedDate") else None),
-                exchange=(str(row.get("proposedExchange")) if row.get("proposedExchange") else None),
-                price_range=(str(row.get("proposedSharePrice")) if row.get("proposedSharePrice") else None),
-                deal_size=(
-                    str(row.get("dollarValueOfSharesOffered") or row.get("sharesOffered"))
-                    if (row.get("dollarValueOfSharesOffered") or row.get("sharesOffered"))
-                    else None
-                ),
-                link_url=None,
-            )
-            items.append(item)
+        records.extend(_ipo_records(priced, priced["rows"], "PRICED", "pricedDate"))
 
-    return items
+    return IpoItem.batch(records)
 
 
 def normalize_from_html_rows(rows: List[Dict[str, Any]]) -> List[IpoItem]:
@@ -115,6 +244,67 @@ def normalize_from_html_rows(rows: List[Dict[str, Any]]) -> List[IpoItem]:
     return items
 
 
+# Earnings columns: (field, candidate keys in preference order).
+_EARNINGS_FIELDS = (
+    ("company", ("companyname", "company", "name")),
+    ("symbol", ("symbol", "ticker")),
+    ("date", ("date", "reportdate", "earningsdate")),
+    ("time", ("time", "timeofday", "timeOfDay")),
+    ("eps_consensus", ("epsconsensus", "eps_consensus", "epsConsensus", "epsForecast")),
+    ("eps_actual", ("epsactual", "eps_actual", "epsActual", "eps")),
+    ("url", ("url", "link", "href")),
+    ("fiscal_quarter", ("fiscalQuarterEnding", "fiscalquarterending")),
+    ("market_cap", ("marketCap", "marketcap")),
+    ("surprise", ("surprise",)),
+    ("estimates", ("noOfEsts", "noofests")),
+)
+
+
+@lru_cache(maxsize=64)
+def _compile_earnings_schema(keys: FrozenSet[str], has_fallback_date: bool) -> Tuple[Tuple[str, ...], ...]:
+    compiled = tuple(_present(keys, candidates) for _, candidates in _EARNINGS_FIELDS)
+    missing = [
+        name for (name, _), found in zip(_EARNINGS_FIELDS, compiled)
+        if not found and (name in ("company", "symbol") or (name == "date" and not has_fallback_date))
+    ]
+    if keys and missing:
+        _warn_unknown_schema("earnings", keys, missing)
+    return compiled
+
+
+def _clean(value: Any) -> Optional[str]:
+    """``str(value).strip()``, with empty strings as None."""
+    if value is None:
+        return None
+    text = (value if type(value) is str else str(value)).strip()
+    return text or None
+
+
+def _clean_column(rows: List[Dict[str, Any]], keys: Tuple[str, ...]) -> List[Optional[str]]:
+    """One field across ``rows``: the first non-null candidate key, stripped, empty as None."""
+    if not keys:
+        return [None] * len(rows)
+    if len(keys) == 1:
+        key = keys[0]
+        values = [row.get(key) for row in rows]
+    else:
+        values = [row.get(keys[0]) for row in rows]
+        for key in keys[1:]:
+            values = [row.get(key) if v is None else v for v, row in zip(values, rows)]
+    # Inline fast path for str values; _clean handles None and numbers.
+    return [(v.strip() or None) if type(v) is str else _clean(v) for v in values]
+
+
+@lru_cache(maxsize=256)
+def _time_of_day(value: str) -> str:
+    t = value.strip().lower()
+    if t == "time-not-supplied":
+        return "TBD"
+    if t in {"bmo", "amc"}:
+        return t.upper()
+    return value
+
+
 def normalize_earnings_from_json(month_payload: Dict[str, Any]) -> List[EarningsItem]:
     """Normalize Nasdaq earnings JSON month payload to EarningsItem list.
 
@@ -122,13 +312,25 @@ def normalize_earnings_from_json(month_payload: Dict[str, Any]) -> List[Earnings
     Common patterns:
       data.rows[] with fields like: symbol, companyname, date, time, epsconsensus, epsactual, url
       or deeply nested under data.calendar.rows[]
+    Which key holds each field is decided once per table from its ``headers``
+    and first row, and each field is then extracted as a column over all
+    rows. Layouts with no column for a key field are logged once.
+    """
+    return earnings_table_from_json(month_payload).items
+
+
+def earnings_table_from_json(month_payload: Dict[str, Any]) -> EarningsTable:
+    """Like :func:`normalize_earnings_from_json`, keeping the numeric columns.
+
+    Market cap, EPS, consensus EPS, surprise and the number of estimates are
+    parsed into float arrays alongside the items; see :class:`EarningsTable`.
     """
-    items: List[EarningsItem] = []
+    result = EarningsTable()
     if not isinstance(month_payload, dict):
-        return items
+        return result
     data = month_payload.get("data") or month_payload
     if not isinstance(data, dict):
-        return items
+        return result
 
     # Fallback date (for daily endpoints rows without explicit date)
     fallback_date: Optional[date] = None
@@ -139,58 +341,42 @@ def normalize_earnings_from_json(month_payload: Dict[str, Any]) -> List[Earnings
             fallback_date = maybe_dt
 
     # Try a few likely structures
-    candidate_lists: List[Optional[List[Dict[str, Any]]]] = []
+    tables: List[Dict[str, Any]] = []
     if isinstance(data.get("calendar"), dict) and isinstance(data["calendar"].get("rows"), list):
-        candidate_lists.append(data["calendar"]["rows"])  # type: ignore[index]
+        tables.append(data["calendar"])
     if isinstance(data.get("rows"), list):
-        candidate_lists.append(data.get("rows"))  # type: ignore[arg-type]
+        tables.append(data)
     if isinstance(data.get("upcoming"), dict) and isinstance(data["upcoming"].get("rows"), list):
-        candidate_lists.append(data["upcoming"]["rows"])  # type: ignore[index]
-
-    rows: List[Dict[str, Any]] = []
-    for lst in candidate_lists:
-        if isinstance(lst, list):
-            rows.extend([r for r in lst if isinstance(r, dict)])
-
-    def get_str(d: Dict[str, Any], *keys: str) -> Optional[str]:
-        for k in keys:
-            v = d.get(k)
-            if v is not None:
-                s = str(v).strip()
-                return s if s else None
-        return None
+        tables.append(data["upcoming"])
 
-    for row in rows:
-        company = get_str(row, "companyname", "company", "name")
-        symbol = get_str(row, "symbol", "ticker")
-        dt_str = get_str(row, "date", "reportdate", "earningsdate")
-        tod = get_str(row, "time", "timeofday", "timeOfDay")
-        # Common naming variants
-        eps_c = get_str(row, "epsconsensus", "eps_consensus", "epsConsensus", "epsForecast")
-        eps_a = get_str(row, "epsactual", "eps_actual", "epsActual", "eps")
-        url = get_str(row, "url", "link", "href")
-        parsed_date = parse_date_safe(dt_str)
-        if parsed_date is None:
-            parsed_date = fallback_date
-
-        time_clean = None
-        if tod:
-            t = tod.strip().lower()
-            if t == "time-not-supplied":
-                time_clean = "TBD"
-            elif t in {"bmo", "amc"}:
-                time_clean = t.upper()
-            else:
-                time_clean = tod
-
-        items.append(EarningsItem(
-            company_name=str(company or "Unknown Company"),
-            symbol=str(symbol) if symbol else None,
-            report_date=parsed_date,
-            time_of_day=time_clean,
-            eps_consensus=str(eps_c) if eps_c else None,
-            eps_actual=str(eps_a) if eps_a else None,
-            link_url=str(url) if url else None,
+    records: List[Tuple[Any, ...]] = []
+    for table in tables:
+        rows = [row for row in table["rows"] if isinstance(row, dict)]
+        (company_k, symbol_k, date_k, time_k, eps_c_k, eps_a_k, url_k,
+         quarter_k, cap_k, surprise_k, ests_k) = _compile_earnings_schema(
+            _schema_keys(table, rows), fallback_date is not None
+        )
+        if date_k:
+            dates = [parse_date_safe(d) or fallback_date for d in _clean_column(rows, date_k)]
+        else:
+            dates = [fallback_date] * len(rows)
+        eps_consensus = _clean_column(rows, eps_c_k)
+        eps_actual = _clean_column(rows, eps_a_k)
+        records.extend(zip(
+            [c or "Unknown Company" for c in _clean_column(rows, company_k)],
+            _clean_column(rows, symbol_k),
+            dates,
+            [_time_of_day(t) if t else None for t in _clean_column(rows, time_k)],
+            eps_consensus,
+            eps_actual,
+            _clean_column(rows, url_k),
         ))
+        result.fiscal_quarter.extend(_clean_column(rows, quarter_k))
+        result.market_cap.extend(parse_numbers(_clean_column(rows, cap_k)))
+        result.eps.extend(parse_numbers(eps_actual))
+        result.eps_forecast.extend(parse_numbers(eps_consensus))
+        result.surprise.extend(parse_numbers(_clean_column(rows, surprise_k)))
+        result.estimates.extend(parse_numbers(_clean_column(rows, ests_k)))
 
-    return items
+    result.items = EarningsItem.batch(records)
+    return result
@@ -1,10 +1,19 @@
 from __future__ import annotations
 
+import calendar
 import json
 import logging
-from dataclasses import dataclass
+import os
+import re
+import sys
+import tempfile
+from dataclasses import dataclass, field
 from datetime import date, datetime, timezone
-from typing import List, Optional
+from functools import lru_cache
+from pathlib import Path
+from typing import Any, Iterable, List, Optional, Tuple
+
+_DASH_RUN = re.compile("-{2,}")
 
 
 def configure_logging() -> None:
@@ -14,6 +23,28 @@ def configure_logging() -> None:
     )
 
 
+def env_int(name: str, default: int) -> int:
+    raw = os.environ.get(name)
+    if raw is None or not raw.strip():
+        return default
+    try:
+        return int(raw)
+    except ValueError:
+        logging.warning("Ignoring non-integer %s=%r", name, raw)
+        return default
+
+
+def env_float(name: str, default: float) -> float:
+    raw = os.environ.get(name)
+    if raw is None or not raw.strip():
+        return default
+    try:
+        return float(raw)
+    except ValueError:
+        logging.warning("Ignoring non-numeric %s=%r", name, raw)
+        return default
+
+
 def utc_now() -> datetime:
     return datetime.now(timezone.utc)
 
@@ -22,7 +53,16 @@ def today_utc() -> date:
     return utc_now().date()
 
 
-@dataclass(frozen=True)
+@lru_cache(maxsize=4096)
+def format_ymd(d: Optional[date]) -> str:
+    return d.strftime("%Y%m%d") if d else "tbd"
+
+
+def _intern(value: Optional[str]) -> Optional[str]:
+    return sys.intern(value) if value is not None else None
+
+
+@dataclass(frozen=True, slots=True)
 class IpoItem:
     company_name: str
     symbol: Optional[str]
@@ -32,18 +72,38 @@ class IpoItem:
     price_range: Optional[str]
     deal_size: Optional[str]
     link_url: Optional[str]
+    # Derived once at construction; excluded from repr/eq so they never
+    # change an item's identity.
+    ymd: str = field(init=False, repr=False, compare=False)
+    _uid: str = field(init=False, repr=False, compare=False)
 
-    def uid(self) -> str:
+    def __post_init__(self) -> None:
+        ymd = format_ymd(self.expected_date)
         symbol_or_slug = self.symbol or slugify(self.company_name)
-        ymd = self.expected_date.strftime("%Y%m%d") if self.expected_date else "tbd"
-        return f"ipo-{symbol_or_slug}-{ymd}@nasdaq-ipo"
+        object.__setattr__(self, "ymd", ymd)
+        object.__setattr__(self, "_uid", f"ipo-{symbol_or_slug}-{ymd}@nasdaq-ipo")
+
+    @classmethod
+    def batch(cls, records: Iterable[Tuple[Any, ...]]) -> List["IpoItem"]:
+        """Build many items from positional field tuples.
+
+        Low-cardinality strings (status, exchange) are interned so thousands
+        of rows share one copy.
+        """
+        return [
+            cls(name, symbol, sys.intern(status), day, _intern(exchange), price, deal, link)
+            for name, symbol, status, day, exchange, price, deal, link in records
+        ]
+
+    def uid(self) -> str:
+        return self._uid
 
     def summary(self) -> str:
         base = self.symbol if self.symbol else "IPO"
         return f"{base} – {self.company_name}"
 
 
-@dataclass(frozen=True)
+@dataclass(frozen=True, slots=True)
 class EarningsItem:
     company_name: str
     symbol: Optional[str]
@@ -52,11 +112,28 @@ class EarningsItem:
     eps_consensus: Optional[str]
     eps_actual: Optional[str]
     link_url: Optional[str]
+    ymd: str = field(init=False, repr=False, compare=False)
+    _bare_uid: str = field(init=False, repr=False, compare=False)
+    _uid: str = field(init=False, repr=False, compare=False)
 
-    def uid(self) -> str:
+    def __post_init__(self) -> None:
+        ymd = format_ymd(self.report_date)
         symbol_or_slug = self.symbol or slugify(self.company_name)
-        ymd = self.report_date.strftime("%Y%m%d") if self.report_date else "tbd"
-        return f"earnings-{symbol_or_slug}-{ymd}@nasdaq-earnings"
+        bare_uid = f"{symbol_or_slug}-{ymd}@nasdaq-earnings"
+        object.__setattr__(self, "ymd", ymd)
+        object.__setattr__(self, "_bare_uid", bare_uid)
+        object.__setattr__(self, "_uid", "earnings-" + bare_uid)
+
+    @classmethod
+    def batch(cls, records: Iterable[Tuple[Any, ...]]) -> List["EarningsItem"]:
+        """Build many items from positional field tuples, interning time-of-day."""
+        return [
+            cls(name, symbol, day, _intern(tod), eps_c, eps_a, link)
+            for name, symbol, day, tod, eps_c, eps_a, link in records
+        ]
+
+    def uid(self) -> str:
+        return self._uid
 
     def uid_without_category_prefix(self) -> str:
         """Return a stable UID without the leading 'earnings-' category prefix.
@@ -65,27 +142,52 @@ class EarningsItem:
         while the combined feed continues to use the category-prefixed UID to
         avoid any ambiguity across mixed event types.
         """
-        symbol_or_slug = self.symbol or slugify(self.company_name)
-        ymd = self.report_date.strftime("%Y%m%d") if self.report_date else "tbd"
-        return f"{symbol_or_slug}-{ymd}@nasdaq-earnings"
+        return self._bare_uid
 
     def summary(self) -> str:
         base = self.symbol if self.symbol else "Earnings"
         return f"{base} – {self.company_name}"
 
 
+@lru_cache(maxsize=8192)
 def slugify(value: str) -> str:
     allowed = [c.lower() if c.isalnum() else "-" for c in value]
-    slug = "".join(allowed)
-    while "--" in slug:
-        slug = slug.replace("--", "-")
-    return slug.strip("-")
+    return _DASH_RUN.sub("-", "".join(allowed)).strip("-")
 
 
 def json_dump_pretty(obj: object) -> str:
     return json.dumps(obj, ensure_ascii=False, indent=2, sort_keys=True)
 
 
+def atomic_write_bytes(path: Path, data: bytes) -> None:
+    """Replace ``path`` with ``data`` via a temp file, so readers never see a partial file."""
+    path.parent.mkdir(parents=True, exist_ok=True)
+    fd, tmp = tempfile.mkstemp(dir=path.parent, prefix=path.name, suffix=".tmp")
+    try:
+        with os.fdopen(fd, "wb") as f:
+            f.write(data)
+        # mkstemp creates 0600 files; match a regular open() instead.
+        os.chmod(tmp, 0o644)
+        os.replace(tmp, path)
+    except BaseException:
+        try:
+            os.unlink(tmp)
+        except OSError:
+            pass
+        raise
+
+
+def days_in_month(month_start: date) -> List[date]:
+    ndays = calendar.monthrange(month_start.year, month_start.month)[1]
+    return [date(month_start.year, month_start.month, d) for d in range(1, ndays + 1)]
+
+
+def shift_month(d: date, months: int) -> date:
+    """First day of the month ``months`` away from ``d``'s month (negative goes back)."""
+    index = d.year * 12 + d.month - 1 + months
+    return date(index // 12, index % 12 + 1, 1)
+
+
 def month_range(start: date, months: int) -> List[date]:
     out: List[date] = []
     y, m = start.year, start.month
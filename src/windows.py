@@ -0,0 +1,87 @@
+from __future__ import annotations
+
+import logging
+from bisect import bisect_left
+from datetime import date, timedelta
+from pathlib import Path
+from typing import Iterable, List, Mapping, Optional, Tuple
+
+from .build_ics import FeedWriter, calendar_header, merged_events, render_combined_block
+from .event_state import EventState
+from .precompress import ALL_SUFFIXES
+from .render_cache import RenderCache
+from .utils import EarningsItem, IpoItem, shift_month
+
+WINDOWS_DIR = "windows"
+# Rolling windows starting today, in days
+ROLLING_WINDOWS = (7, 30)
+
+
+def window_ranges(today: date, months: List[date]) -> List[Tuple[str, str, date, date]]:
+    """``(relative path, title, start, end)`` for every window feed; ``end`` is exclusive."""
+    ranges = [
+        (f"{WINDOWS_DIR}/next-{days}-days.ics", f"Nasdaq IPO & Earnings: next {days} days",
+         today, today + timedelta(days=days))
+        for days in ROLLING_WINDOWS
+    ]
+    for month in months:
+        ranges.append((
+            f"{WINDOWS_DIR}/{month:%Y-%m}.ics", f"Nasdaq IPO & Earnings: {month:%B %Y}",
+            month, shift_month(month, 1),
+        ))
+    return ranges
+
+
+def write_window_feeds(
+    dist_dir: Path,
+    ipo_items: Iterable[IpoItem],
+    earnings_items: Iterable[EarningsItem],
+    today: date,
+    months: List[date],
+    cache: Optional[RenderCache] = None,
+    state: Optional[EventState] = None,
+    previous_hashes: Optional[Mapping[str, str]] = None,
+) -> List[FeedWriter]:
+    """Write the rolling and per-month slices of the combined feed.
+
+    Both inputs must already be sorted by date. They are merged once into the
+    combined order, and each window is a ``bisect`` slice of that sequence;
+    an event is rendered at most once however many windows contain it. Window
+    feeds from a previous build that are no longer produced (months that left
+    the horizon) are deleted. Returns the closed writers.
+    """
+    dist_dir = Path(dist_dir)
+    previous_hashes = previous_hashes or {}
+    merged = list(merged_events(ipo_items, earnings_items))
+    days = [day for day, _, _ in merged]
+    blocks: List[Optional[Tuple[str, Optional[str]]]] = [None] * len(merged)
+
+    def block_at(position: int) -> Tuple[str, Optional[str]]:
+        entry = blocks[position]
+        if entry is None:
+            _, category, item = merged[position]
+            stamp = state.stamp_for(category, item) if state else None
+            entry = blocks[position] = (render_combined_block(item, cache), stamp)
+        return entry
+
+    (dist_dir / WINDOWS_DIR).mkdir(parents=True, exist_ok=True)
+    writers: List[FeedWriter] = []
+    for path, title, start, end in window_ranges(today, months):
+        prodid = "nasdaq-" + path.rsplit(".", 1)[0].replace("/", "-")
+        header = calendar_header(prodid, title)
+        with FeedWriter(dist_dir / path, header, previous_hash=previous_hashes.get(path)) as feed:
+            for position in range(bisect_left(days, start), bisect_left(days, end)):
+                feed.write_event(*block_at(position))
+        writers.append(feed)
+
+    produced = {feed.path.relative_to(dist_dir).as_posix() for feed in writers}
+    for name in previous_hashes:
+        if name.startswith(WINDOWS_DIR + "/") and name.endswith(".ics") and name not in produced:
+            (dist_dir / name).unlink(missing_ok=True)
+            for suffix in ALL_SUFFIXES:
+                (dist_dir / (name + suffix)).unlink(missing_ok=True)
+    logging.info(
+        "Window feeds: %d written from %d events",
+        len(writers), sum(1 for entry in blocks if entry is not None),
+    )
+    return writers